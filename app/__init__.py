@@ -4,52 +4,83 @@ Initialize and configure Flask app
 """
 from flask import Flask
 from flask_cors import CORS
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import logging
 import os
+import queue
+import sys
 
-from app.config import Config
+from app.config import CONFIG
 
 
-def create_app(config_class=Config):
+def configure_logging(level: int = logging.INFO):
+    """
+    Send log records through a queue so request and worker threads never block on stdout
+
+    A QueueHandler on the root logger enqueues records; a QueueListener thread
+    writes them out. Does nothing if the root logger already has handlers.
+
+    Args:
+        level: Root logger level
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def create_app(config=CONFIG):
     """
     Create and configure Flask application
 
     Args:
-        config_class: Configuration class to use
+        config: Configuration instance to use
 
     Returns:
         Configured Flask app instance
     """
+    # Configure logging once (no-op if the root logger already has handlers)
+    configure_logging()
+    logger = logging.getLogger(__name__)
+
     # Initialize Flask app
     app = Flask(__name__)
 
     # Load configuration
-    app.config.from_object(config_class)
+    app.config.from_object(config)
 
     # Enable CORS (for API calls from different origins)
     CORS(app)
 
     # Initialize app configurations
-    Config.init_app()
+    config.init_app()
 
     # Register blueprints
     from app.routes.brd_routes import brd_bp
     app.register_blueprint(brd_bp)
 
     # Create upload folder if it doesn't exist
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(config.UPLOAD_FOLDER, exist_ok=True)
 
     # Log app startup
-    with app.app_context():
-        print("\n" + "=" * 70)
-        print("🚀 BRD Test Case Automation System")
-        print("=" * 70)
-        print(f"Environment: {app.config['FLASK_ENV']}")
-        print(f"Debug Mode: {app.config['DEBUG']}")
-        print(f"Upload Folder: {app.config['UPLOAD_FOLDER']}")
-        print(f"Max File Size: {app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024):.0f}MB")
-        print(f"OpenAI Model: {app.config['OPENAI_MODEL']}")
-        print(f"Google Sheet: {app.config['GOOGLE_SHEET_NAME']}")
-        print(f"Coverage Target: {app.config['COVERAGE_TARGET']}%")
-        print("=" * 70 + "\n")
+    logger.info("🚀 BRD Test Case Automation System")
+    logger.info("Environment: %s", config.FLASK_ENV)
+    logger.info("Debug Mode: %s", config.DEBUG)
+    logger.info("Upload Folder: %s", config.UPLOAD_FOLDER)
+    logger.info("Max File Size: %.0fMB", config.MAX_FILE_SIZE_MB)
+    logger.info("OpenAI Model: %s", config.OPENAI_MODEL)
+    logger.info("Google Sheet: %s", config.GOOGLE_SHEET_NAME)
+    logger.info("Coverage Target: %s%%", config.COVERAGE_TARGET)
 
     return app
\ No newline at end of file
@@ -3,90 +3,125 @@ Configuration file for BRD Test Case Automation
 Loads environment variables and provides configuration classes
 """
 import os
-from dotenv import load_dotenv
+import functools
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def load_env() -> bool:
+    """
+    Load environment variables from .env file (parsed once per process)
+
+    Returns:
+        True if a .env file was found and loaded
+    """
+    from dotenv import load_dotenv
+    return load_dotenv()
+
+
+load_env()
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Base configuration class"""
+    """Base configuration (immutable snapshot of the environment taken at import)"""
 
     # Flask Configuration
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    FLASK_ENV = os.getenv('FLASK_ENV', 'development')
-    DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    SECRET_KEY: str = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    FLASK_ENV: str = os.getenv('FLASK_ENV', 'development')
+    DEBUG: bool = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    TESTING: bool = False
 
     # Upload Configuration
-    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
-    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB default
-    ALLOWED_EXTENSIONS = set(os.getenv('ALLOWED_EXTENSIONS', 'pdf,docx').split(','))
+    UPLOAD_FOLDER: str = os.getenv('UPLOAD_FOLDER', 'uploads')
+    MAX_CONTENT_LENGTH: int = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB default
+    ALLOWED_EXTENSIONS: frozenset = frozenset(
+        ext.strip().lower() for ext in os.getenv('ALLOWED_EXTENSIONS', 'pdf,docx').split(',') if ext.strip()
+    )
 
     # OpenAI Configuration
-    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-    OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+    OPENAI_API_KEY: Optional[str] = os.getenv('OPENAI_API_KEY')
+    OPENAI_MODEL: str = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
 
     # Google Sheets Configuration
-    GOOGLE_CREDENTIALS_FILE = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials/service-account.json')
-    GOOGLE_SHEET_NAME = os.getenv('GOOGLE_SHEET_NAME', 'BRD_TestCases_Output')
+    GOOGLE_CREDENTIALS_FILE: str = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials/service-account.json')
+    GOOGLE_SHEET_NAME: str = os.getenv('GOOGLE_SHEET_NAME', 'BRD_TestCases_Output')
 
     # Test Case Configuration
-    TEST_CASE_PREFIX = os.getenv('TEST_CASE_PREFIX', 'TC')
-    COVERAGE_TARGET = int(os.getenv('COVERAGE_TARGET', 80))
+    TEST_CASE_PREFIX: str = os.getenv('TEST_CASE_PREFIX', 'TC')
+    COVERAGE_TARGET: int = int(os.getenv('COVERAGE_TARGET', 80))
 
-    @staticmethod
-    def init_app():
+    # Derived values (computed once in __post_init__)
+    MAX_FILE_SIZE_MB: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'MAX_FILE_SIZE_MB', self.MAX_CONTENT_LENGTH / (1024 * 1024))
+
+    def init_app(self):
         """Initialize application configurations and validate"""
         # Ensure upload folder exists
-        if not os.path.exists(Config.UPLOAD_FOLDER):
-            os.makedirs(Config.UPLOAD_FOLDER)
-            print(f"✓ Created upload folder: {Config.UPLOAD_FOLDER}")
+        if not os.path.exists(self.UPLOAD_FOLDER):
+            os.makedirs(self.UPLOAD_FOLDER)
+            logger.info("✓ Created upload folder: %s", self.UPLOAD_FOLDER)
 
         # Validate required configurations
-        if not Config.OPENAI_API_KEY:
-            print(" WARNING: OPENAI_API_KEY not set in .env file")
-
-        if not os.path.exists(Config.GOOGLE_CREDENTIALS_FILE):
-            print(f" WARNING: Google credentials file not found at {Config.GOOGLE_CREDENTIALS_FILE}")
-            print("   Please follow GOOGLE_SETUP_GUIDE.md to set up credentials")
+        if not self.OPENAI_API_KEY:
+            logger.warning("OPENAI_API_KEY not set in .env file")
+
+        if not os.path.exists(self.GOOGLE_CREDENTIALS_FILE):
+            logger.warning(
+                "Google credentials file not found at %s. "
+                "Please follow GOOGLE_SETUP_GUIDE.md to set up credentials",
+                self.GOOGLE_CREDENTIALS_FILE
+            )
         else:
-            print(f"✓ Google credentials file found: {Config.GOOGLE_CREDENTIALS_FILE}")
+            logger.info("✓ Google credentials file found: %s", self.GOOGLE_CREDENTIALS_FILE)
 
-        print(f"✓ Configuration loaded successfully")
-        print(f"  - Model: {Config.OPENAI_MODEL}")
-        print(f"  - Google Sheet: {Config.GOOGLE_SHEET_NAME}")
-        print(f"  - Coverage Target: {Config.COVERAGE_TARGET}%")
+        logger.info("✓ Configuration loaded successfully")
+        logger.info("  - Model: %s", self.OPENAI_MODEL)
+        logger.info("  - Google Sheet: %s", self.GOOGLE_SHEET_NAME)
+        logger.info("  - Coverage Target: %s%%", self.COVERAGE_TARGET)
 
 
+@dataclass(frozen=True, slots=True)
 class DevelopmentConfig(Config):
     """Development configuration"""
-    DEBUG = True
-    TESTING = False
+    DEBUG: bool = True
+    TESTING: bool = False
 
 
+@dataclass(frozen=True, slots=True)
 class ProductionConfig(Config):
     """Production configuration"""
-    DEBUG = False
-    TESTING = False
+    DEBUG: bool = False
+    TESTING: bool = False
 
 
+@dataclass(frozen=True, slots=True)
 class TestingConfig(Config):
     """Testing configuration"""
-    TESTING = True
-    DEBUG = True
+    TESTING: bool = True
+    DEBUG: bool = True
+
 
+# Shared configuration instance, built once at import
+CONFIG = Config()
 
-# Configuration dictionary
+# Configuration dictionary (instances: slotted dataclass fields are descriptors on the class)
 config = {
-    'development': DevelopmentConfig,
-    'production': ProductionConfig,
-    'testing': TestingConfig,
-    'default': DevelopmentConfig
+    'development': DevelopmentConfig(),
+    'production': ProductionConfig(),
+    'testing': TestingConfig(),
 }
+config['default'] = config['development']
 
 
-def get_config(config_name=None):
-    """Get configuration by name"""
+def get_config(config_name=None) -> Config:
+    """Get configuration instance by name"""
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
-    return config.get(config_name, config['default'])
\ No newline at end of file
+    return config.get(config_name, config['default'])
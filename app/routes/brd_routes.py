@@ -2,26 +2,220 @@
 API Routes for BRD Test Case Generation
 Endpoints for uploading BRD and generating test cases
 """
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, current_app, request, jsonify, render_template
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import os
+import logging
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import List, Optional, Tuple
 
-from app.services.pdf_extractor import PDFExtractor
-from app.services.chatgpt_service import ChatGPTService
-from app.services.gsheet_service import GoogleSheetService
-from app.utils.validators import validate_file_upload, validate_brd_content
+from app.services.pdf_extractor import PDFExtractor, get_pdf_extractor
+from app.services.chatgpt_service import SINGLE_CALL, ChatGPTService, get_chatgpt_service, get_model_routing
+from app.services.gsheet_service import GoogleSheetService, get_gsheet_service
+from app.utils.validators import allowed_file, validate_file_upload, validate_brd_content
 from app.utils.helpers import (
     generate_worksheet_name,
+    unique_worksheet_names,
     cleanup_upload_file,
     format_file_size,
     estimate_processing_time
 )
-from app.config import Config
+
+logger = logging.getLogger(__name__)
 
 # Create Blueprint
 brd_bp = Blueprint('brd', __name__)
 
+# Block size used when streaming raw uploads to disk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Upper bound on files processed concurrently per request
+MAX_PARALLEL_FILES = 8
+
+
+def _max_file_size_mb() -> float:
+    """Upload size limit of the current app, in MB"""
+    return current_app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+
+
+# Generated test cases keyed by BRD content hash + target count (LRU)
+TESTCASE_CACHE_SIZE = 256
+_testcase_cache: "OrderedDict[str, list]" = OrderedDict()
+_testcase_cache_lock = threading.Lock()
+
+
+def _testcase_cache_key(brd_content: str, target_count: int) -> str:
+    """Build cache key from BRD content and requested test case count"""
+    digest = hashlib.sha256(brd_content.encode('utf-8')).hexdigest()
+    return f"{digest}:{target_count}"
+
+
+def _get_cached_test_cases(key: str) -> Optional[list]:
+    """Return cached test cases for key, or None on miss"""
+    with _testcase_cache_lock:
+        test_cases = _testcase_cache.get(key)
+        if test_cases is not None:
+            _testcase_cache.move_to_end(key)
+        return test_cases
+
+
+def _store_test_cases(key: str, test_cases: list):
+    """Store test cases, evicting the least recently used entry when full"""
+    with _testcase_cache_lock:
+        _testcase_cache[key] = test_cases
+        _testcase_cache.move_to_end(key)
+        if len(_testcase_cache) > TESTCASE_CACHE_SIZE:
+            _testcase_cache.popitem(last=False)
+
+
+def _generate_for_brd(
+    pdf_source,
+    filename: str,
+    file_size: Optional[int],
+    target_count: int,
+    pdf_extractor: PDFExtractor,
+    chatgpt_service: ChatGPTService,
+    use_cache: bool = True
+) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    Run extraction and test case generation for one BRD
+
+    Google Sheets output is deferred so that all files of a request can be
+    written with a single API call (see _write_to_sheets).
+
+    Args:
+        pdf_source: Path of a saved BRD file or the upload's binary stream
+        filename: Sanitized filename used in results and worksheet naming
+        file_size: Size of the BRD in bytes (None if unknown)
+        target_count: Number of test cases to generate
+        pdf_extractor: PDF extraction service
+        chatgpt_service: ChatGPT generation service
+        use_cache: Reuse test cases previously generated for identical content
+
+    Returns:
+        Tuple of (failure_result, pending_write); exactly one is None
+    """
+    if file_size is not None:
+        file_size_mb = file_size / (1024 * 1024)
+        logger.info("✓ File received: %s (%s)", filename, format_file_size(file_size))
+        logger.info("  Estimated processing time: ~%s seconds", estimate_processing_time(file_size_mb))
+    else:
+        logger.info("✓ File received: %s", filename)
+
+    # Step 3: Extract text from PDF
+    logger.info("Step 1/3: Extracting text from PDF...")
+    success, brd_content, error = pdf_extractor.extract_text(pdf_source, filename=filename)
+
+    if not success:
+        return {
+            'filename': filename,
+            'success': False,
+            'error': f"PDF extraction failed: {error}"
+        }, None
+
+    # Validate BRD content
+    is_valid, error_msg = validate_brd_content(brd_content, min_length=100)
+    if not is_valid:
+        return {
+            'filename': filename,
+            'success': False,
+            'error': error_msg
+        }, None
+
+    # Step 4: Generate test cases using ChatGPT (skipped on cache hit)
+    cache_key = _testcase_cache_key(brd_content, target_count)
+    test_cases = _get_cached_test_cases(cache_key) if use_cache else None
+
+    if test_cases is not None:
+        logger.info("Step 2/3: Reusing %d cached test cases", len(test_cases))
+    else:
+        logger.info("Step 2/3: Generating test cases with ChatGPT...")
+        success, test_cases, error = chatgpt_service.generate_test_cases(
+            brd_content,
+            target_count=target_count,
+            batch_mode=True,
+            use_cache=use_cache
+        )
+
+        if not success:
+            return {
+                'filename': filename,
+                'success': False,
+                'error': f"Test case generation failed: {error}"
+            }, None
+
+        # Only cache complete runs (partial batches report an error message)
+        if error is None:
+            _store_test_cases(cache_key, test_cases)
+
+    return None, {
+        'filename': filename,
+        'worksheet_name': generate_worksheet_name(filename),
+        'test_cases': test_cases,
+        'target_count': target_count
+    }
+
+
+def _write_to_sheets(gsheet_service: GoogleSheetService, pending_writes: List[dict]) -> List[dict]:
+    """
+    Write generated test cases for several BRDs to Google Sheets in one batch
+
+    Args:
+        gsheet_service: Google Sheets export service
+        pending_writes: Pending writes returned by _generate_for_brd
+
+    Returns:
+        Result dictionaries, in the same order as pending_writes
+    """
+    # Step 5: Write to Google Sheets
+    logger.info("Step 3/3: Writing %d file(s) to Google Sheets...", len(pending_writes))
+    # Same-named uploads finishing in the same second would get the same worksheet
+    names = unique_worksheet_names([p['worksheet_name'] for p in pending_writes])
+    for pending, worksheet_name in zip(pending_writes, names):
+        pending['worksheet_name'] = worksheet_name
+
+    outcomes = gsheet_service.batch_write_test_cases(
+        [(p['test_cases'], p['worksheet_name'], p['filename']) for p in pending_writes],
+        test_id_prefix=current_app.config['TEST_CASE_PREFIX']
+    )
+
+    results = []
+    for pending, (success, sheet_url, error) in zip(pending_writes, outcomes):
+        filename = pending['filename']
+        if not success:
+            results.append({
+                'filename': filename,
+                'success': False,
+                'error': f"Google Sheets write failed: {error}"
+            })
+            continue
+
+        # Success!
+        logger.info("✓ COMPLETED: %s", filename)
+
+        # Calculate coverage estimate
+        test_cases = pending['test_cases']
+        target_count = pending['target_count']
+        coverage_percentage = min(95, 40 + (len(test_cases) / target_count) * 50)
+
+        results.append({
+            'filename': filename,
+            'success': True,
+            'worksheet_name': pending['worksheet_name'],
+            'total_test_cases': len(test_cases),
+            'target_test_cases': target_count,
+            'coverage_percentage': round(coverage_percentage, 1),
+            'sheet_url': sheet_url
+        })
+
+    return results
+
 
 @brd_bp.route('/')
 def index():
@@ -48,6 +242,7 @@ def generate_testcases():
         - multipart/form-data
         - field: 'files' (one or more PDF files)
         - optional field: 'target_count' (number of test cases, default: 55)
+        - optional query parameter 'no_cache=1' to force regeneration
 
     Returns:
         JSON with test cases results and Google Sheets URL
@@ -70,152 +265,71 @@ def generate_testcases():
 
         # Get optional parameters
         target_count = int(request.form.get('target_count', 55))
+        use_cache = request.args.get('no_cache') != '1'
 
-        # Initialize services
-        pdf_extractor = PDFExtractor()
-        chatgpt_service = ChatGPTService()
-        gsheet_service = GoogleSheetService()
+        # Get shared services
+        pdf_extractor = get_pdf_extractor()
+        chatgpt_service = get_chatgpt_service()
+        gsheet_service = get_gsheet_service()
 
-        results = []
-        all_success = True
+        # Read from the app config here: worker threads have no app context
+        allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
+        max_size_mb = _max_file_size_mb()
 
-        # Step 2: Process each file
-        for file in files:
+        def process_one(file) -> Tuple[Optional[dict], Optional[dict]]:
+            """Validate a single uploaded file and generate its test cases"""
+            original_name = file.filename
             try:
-                print(f"\n{'=' * 70}")
-                print(f"Processing file: {file.filename}")
-                print(f"{'=' * 70}\n")
+                logger.info("Processing file: %s", original_name)
 
                 # Validate file
-                is_valid, error_msg = validate_file_upload(
+                is_valid, error_msg, file_size = validate_file_upload(
                     file,
-                    Config.ALLOWED_EXTENSIONS,
-                    max_size_mb=16
+                    allowed_extensions,
+                    max_size_mb=max_size_mb
                 )
 
                 if not is_valid:
-                    results.append({
-                        'filename': file.filename,
-                        'success': False,
-                        'error': error_msg
-                    })
-                    all_success = False
-                    continue
-
-                # Save file temporarily
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-                file.save(filepath)
-
-                file_size_mb = os.path.getsize(filepath) / (1024 * 1024)
-                print(f"✓ File saved: {filename} ({format_file_size(os.path.getsize(filepath))})")
-                print(f"  Estimated processing time: ~{estimate_processing_time(file_size_mb)} seconds")
-                print()
-
-                # Step 3: Extract text from PDF
-                print("Step 1/3: Extracting text from PDF...")
-                success, brd_content, error = pdf_extractor.extract_text(filepath)
-
-                if not success:
-                    cleanup_upload_file(filepath)
-                    results.append({
-                        'filename': filename,
-                        'success': False,
-                        'error': f"PDF extraction failed: {error}"
-                    })
-                    all_success = False
-                    continue
-
-                # Validate BRD content
-                is_valid, error_msg = validate_brd_content(brd_content, min_length=100)
-                if not is_valid:
-                    cleanup_upload_file(filepath)
-                    results.append({
-                        'filename': filename,
+                    return {
+                        'filename': original_name,
                         'success': False,
                         'error': error_msg
-                    })
-                    all_success = False
-                    continue
-
-                print()
-
-                # Step 4: Generate test cases using ChatGPT
-                print("Step 2/3: Generating test cases with ChatGPT...")
-                success, test_cases, error = chatgpt_service.generate_test_cases(
-                    brd_content,
-                    target_count=target_count,
-                    batch_mode=True
+                    }, None
+
+                # Read the upload in place (no copy to the upload folder)
+                filename = secure_filename(original_name)
+
+                return _generate_for_brd(
+                    file.stream,
+                    filename,
+                    file_size,
+                    target_count,
+                    pdf_extractor,
+                    chatgpt_service,
+                    use_cache=use_cache
                 )
 
-                if not success:
-                    cleanup_upload_file(filepath)
-                    results.append({
-                        'filename': filename,
-                        'success': False,
-                        'error': f"Test case generation failed: {error}"
-                    })
-                    all_success = False
-                    continue
-
-                print()
-
-                # Step 5: Write to Google Sheets
-                print("Step 3/3: Writing to Google Sheets...")
-                worksheet_name = generate_worksheet_name(filename)
-
-                success, sheet_url, error = gsheet_service.write_test_cases(
-                    test_cases,
-                    worksheet_name,
-                    brd_filename=filename,
-                    test_id_prefix=Config.TEST_CASE_PREFIX
-                )
-
-                if not success:
-                    cleanup_upload_file(filepath)
-                    results.append({
-                        'filename': filename,
-                        'success': False,
-                        'error': f"Google Sheets write failed: {error}"
-                    })
-                    all_success = False
-                    continue
-
-                # Success!
-                cleanup_upload_file(filepath)
-
-                # Calculate coverage estimate
-                coverage_percentage = min(95, 40 + (len(test_cases) / target_count) * 50)
-
-                results.append({
-                    'filename': filename,
-                    'success': True,
-                    'worksheet_name': worksheet_name,
-                    'total_test_cases': len(test_cases),
-                    'target_test_cases': target_count,
-                    'coverage_percentage': round(coverage_percentage, 1),
-                    'sheet_url': sheet_url
-                })
-
-                print(f"\n{'=' * 70}")
-                print(f"✓ COMPLETED: {filename}")
-                print(f"{'=' * 70}\n")
-
             except Exception as e:
-                print(f"✗ Error processing {file.filename}: {str(e)}")
-                results.append({
-                    'filename': file.filename,
+                logger.exception("✗ Error processing %s", original_name)
+                return {
+                    'filename': original_name,
                     'success': False,
                     'error': f"Unexpected error: {str(e)}"
-                })
-                all_success = False
+                }, None
+
+        # Step 2: Process files concurrently (each is dominated by network I/O)
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_FILES, len(files))) as executor:
+            outcomes = list(executor.map(process_one, files))
 
-                # Cleanup if file was saved
-                try:
-                    filepath = os.path.join(Config.UPLOAD_FOLDER, secure_filename(file.filename))
-                    cleanup_upload_file(filepath)
-                except:
-                    pass
+        # Write every generated file to Google Sheets in one batch
+        results = [result for result, _ in outcomes]
+        pending_indices = [i for i, (_, pending) in enumerate(outcomes) if pending]
+        if pending_indices:
+            written = _write_to_sheets(gsheet_service, [outcomes[i][1] for i in pending_indices])
+            for i, result in zip(pending_indices, written):
+                results[i] = result
+
+        all_success = all(r['success'] for r in results)
 
         # Step 6: Return results
         response = {
@@ -230,28 +344,142 @@ def generate_testcases():
         status_code = 200 if all_success else 207  # 207 = Multi-Status
         return jsonify(response), status_code
 
+    except RequestEntityTooLarge:
+        raise
+
     except Exception as e:
-        print(f"✗ Fatal error in generate_testcases endpoint: {str(e)}")
+        logger.exception("✗ Fatal error in generate_testcases endpoint")
         return jsonify({
             'success': False,
             'error': f'Server error: {str(e)}'
         }), 500
 
 
-@brd_bp.route('/api/config', methods=['GET'])
-def get_config():
-    """Get current configuration (for UI display)"""
-    return jsonify({
+@brd_bp.route('/api/generate-testcases/stream', methods=['POST'])
+def generate_testcases_stream():
+    """
+    Generate test cases from a single BRD PDF sent as the raw request body
+
+    The body is written to disk in large blocks straight from the WSGI input
+    stream, skipping multipart parsing. Prefer this endpoint for large PDFs;
+    /api/generate-testcases remains the simpler choice for small or
+    multi-file uploads.
+
+    Expected request:
+        - body: raw PDF bytes
+        - header 'X-Filename': original filename (required)
+        - optional query parameter 'target_count' (default: 55)
+        - optional query parameter 'no_cache=1' to force regeneration
+
+    Returns:
+        JSON with test case results and Google Sheets URL
+    """
+    original_name = request.headers.get('X-Filename', '')
+    if not original_name:
+        return jsonify({
+            'success': False,
+            'error': 'Missing X-Filename header'
+        }), 400
+
+    allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
+    if not allowed_file(original_name, allowed_extensions):
+        return jsonify({
+            'success': False,
+            'error': f"File type not allowed. Allowed types: {', '.join(sorted(allowed_extensions))}"
+        }), 400
+
+    filename = secure_filename(original_name)
+    # Unique temp path: concurrent uploads of the same filename must not share (or delete) a file
+    fd, filepath = tempfile.mkstemp(dir=current_app.config['UPLOAD_FOLDER'], suffix=os.path.splitext(filename)[1])
+
+    try:
+        target_count = int(request.args.get('target_count', 55))
+        use_cache = request.args.get('no_cache') != '1'
+
+        logger.info("Processing streamed file: %s", filename)
+
+        # Stream request body to disk
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = request.stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+            file_size = out.tell()
+
+        result, pending = _generate_for_brd(
+            filepath,
+            filename,
+            file_size,
+            target_count,
+            get_pdf_extractor(),
+            get_chatgpt_service(),
+            use_cache=use_cache
+        )
+        if pending:
+            result = _write_to_sheets(get_gsheet_service(), [pending])[0]
+
+    except RequestEntityTooLarge:
+        raise
+
+    except Exception as e:
+        logger.exception("✗ Error processing %s", filename)
+        result = {
+            'filename': filename,
+            'success': False,
+            'error': f"Unexpected error: {str(e)}"
+        }
+
+    finally:
+        cleanup_upload_file(filepath)
+
+    response = {
+        'success': result['success'],
+        'message': 'All files processed successfully' if result['success'] else 'Some files failed to process',
+        'total_files': 1,
+        'successful_files': 1 if result['success'] else 0,
+        'failed_files': 0 if result['success'] else 1,
+        'results': [result]
+    }
+
+    status_code = 200 if result['success'] else 207
+    return jsonify(response), status_code
+
+
+def _config_payload() -> dict:
+    """Build the /api/config payload from the current app's configuration"""
+    config = current_app.config
+    return {
         'success': True,
         'config': {
-            'model': Config.OPENAI_MODEL,
-            'coverage_target': Config.COVERAGE_TARGET,
-            'test_case_prefix': Config.TEST_CASE_PREFIX,
-            'allowed_extensions': list(Config.ALLOWED_EXTENSIONS),
-            'max_file_size_mb': Config.MAX_CONTENT_LENGTH / (1024 * 1024),
-            'google_sheet_name': Config.GOOGLE_SHEET_NAME
+            'model': config['OPENAI_MODEL'],
+            'models': get_model_routing(config['OPENAI_MODEL']),
+            'single_call': SINGLE_CALL,
+            'coverage_target': config['COVERAGE_TARGET'],
+            'test_case_prefix': config['TEST_CASE_PREFIX'],
+            'allowed_extensions': sorted(config['ALLOWED_EXTENSIONS']),
+            'max_file_size_mb': _max_file_size_mb(),
+            'google_sheet_name': config['GOOGLE_SHEET_NAME']
         }
-    }), 200
+    }
+
+
+def _config_body() -> Tuple[bytes, str]:
+    """Serialize the /api/config payload once per app and derive its ETag"""
+    cached = current_app.extensions.get('brd_config_body')
+    if cached is None:
+        body = jsonify(_config_payload()).get_data()
+        cached = current_app.extensions['brd_config_body'] = (body, hashlib.sha256(body).hexdigest())
+    return cached
+
+
+@brd_bp.route('/api/config', methods=['GET'])
+def get_config():
+    """Get current configuration (for UI display), honoring If-None-Match"""
+    body, etag = _config_body()
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
 @brd_bp.errorhandler(413)
@@ -259,7 +487,7 @@ def request_entity_too_large(error):
     """Handle file too large error"""
     return jsonify({
         'success': False,
-        'error': f'File too large. Maximum size: {Config.MAX_CONTENT_LENGTH / (1024 * 1024)}MB'
+        'error': f'File too large. Maximum size: {_max_file_size_mb()}MB'
     }), 413
 
 
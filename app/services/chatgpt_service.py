@@ -4,57 +4,516 @@ Call OpenAI API to generate test cases from BRD content
 Focus on UI/UX testing with 3-batch strategy for 90 test cases
 """
 import os
+import re
 import json
-from typing import List, Dict, Optional, Tuple
-from openai import OpenAI
-from dotenv import load_dotenv
+import atexit
+import time
+import logging
+import string
+import asyncio
+import hashlib
+import functools
+import tempfile
+import threading
+from typing import Awaitable, List, Dict, Optional, Tuple, TypeVar, Union
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, BadRequestError, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+try:
+    import orjson  # Optional: faster JSON parsing of responses
+except ImportError:
+    orjson = None
+
+try:
+    import tiktoken  # Optional: exact token counts when chunking long BRDs
+except ImportError:
+    tiktoken = None
+
+from app.config import load_env
+from app.utils.validators import REQUIRED_TC_FIELDS, REQUIRED_TC_FIELD_SET
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# A single background event loop runs every async OpenAI call. The async
+# client's connection pool is bound to the loop it first runs on, so one
+# long-lived loop lets the pool be reused across requests and threads
+# (asyncio.run would create, then close, a new loop on every call).
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='chatgpt-event-loop', daemon=True).start()
+        return _loop
+
+
+def _run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the shared event loop and block until it completes"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+
+# Pooled HTTP client shared by every ChatGPTService instance. Keep-alive
+# connections are reused across calls, avoiding a TCP/TLS handshake per
+# request. It is only used from the shared event loop (see _get_event_loop).
+_SHARED_HTTP = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    timeout=httpx.Timeout(120.0)
+)
+
+
+class _RateLimiter:
+    """
+    Token bucket allowing `rate` acquisitions per `period` seconds
 
-load_dotenv()
+    Only used from the shared event loop, so no locking is needed.
+    """
 
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
 
-class ChatGPTService:
-    """Service to interact with OpenAI ChatGPT API"""
+    async def acquire(self):
+        """Wait until a request slot is available, then take it"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
 
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
-        """
-        Initialize ChatGPT service
 
-        Args:
-            api_key: OpenAI API key (if None, loads from environment)
-            model: Model to use (if None, loads from environment)
-        """
-        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        self.model = model or os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+# Process-wide OpenAI request budget shared by all services and batches
+_rate_limiter = _RateLimiter(int(os.getenv('OPENAI_MAX_REQUESTS_PER_MINUTE', 3500)))
 
-        if not self.api_key:
-            raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in .env file")
+# Transient errors worth retrying (timeouts are a subclass of APIConnectionError)
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+MAX_API_ATTEMPTS = 6
 
-        self.client = OpenAI(api_key=self.api_key)
+_exponential_backoff = wait_random_exponential(min=1, max=60)
 
-    def _create_prompt_ui_happy_path(self, brd_content: str, count: int = 30) -> str:
-        """
-        Create prompt for generating UI Happy Path test cases
 
-        Args:
-            brd_content: BRD document content
-            count: Number of test cases to generate
+def _wait_retry_after(retry_state) -> float:
+    """Honor the server's Retry-After header, else use jittered exponential backoff"""
+    response = getattr(retry_state.outcome.exception(), 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            pass
+    return _exponential_backoff(retry_state)
+
+
+# On-disk cache of raw ChatGPT responses, keyed by model + prompt (a relative
+# CHATGPT_CACHE_DIR is resolved against the project root, not the working directory)
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = os.path.join(_PROJECT_ROOT, os.getenv('CHATGPT_CACHE_DIR', os.path.join('.cache', 'chatgpt')))
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
+CACHE_PRUNE_INTERVAL_SECONDS = 60 * 60  # Expired entries are deleted at most hourly, on write
+
+_last_cache_prune: Optional[float] = None  # time.monotonic() of the last prune
+
+
+def _response_cache_key(model: str, prompt: str) -> str:
+    """Hash model + whitespace-normalized prompt (reformatting of the BRD still hits)"""
+    normalized = ' '.join(prompt.split())
+    return hashlib.sha256(f"{model}::{normalized}".encode('utf-8')).hexdigest()
+
+
+def _read_cached_response(key: str) -> Optional[str]:
+    """Return cached response text, or None if missing or older than the TTL"""
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL_SECONDS:
+            os.remove(path)
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['response']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _prune_cached_responses():
+    """Delete cache entries (and temp files left by failed writes) older than the TTL"""
+    global _last_cache_prune
+    _last_cache_prune = time.monotonic()
+
+    expired_before = time.time() - CACHE_TTL_SECONDS
+    try:
+        with os.scandir(CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith(('.json', '.tmp')) and entry.stat().st_mtime < expired_before:
+                        os.remove(entry.path)
+                except OSError:
+                    pass  # Removed concurrently
+    except OSError as e:
+        logger.warning("Could not prune ChatGPT response cache: %s", e)
+
+
+def _write_cached_response(key: str, response_text: str):
+    """Atomically store response text (write to a temp file, then rename)"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'response': response_text}, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(CACHE_DIR, f"{key}.json"))
+    except OSError as e:
+        logger.warning("Could not write ChatGPT response cache: %s", e)
+        return
+
+    if _last_cache_prune is None or time.monotonic() - _last_cache_prune >= CACHE_PRUNE_INTERVAL_SECONDS:
+        _prune_cached_responses()
+
+
+class _TestCaseStreamParser:
+    """
+    Incrementally decode a JSON array of test case objects as response text streams in
 
-        Returns:
-            Formatted prompt string
-        """
-        prompt = f"""You are an expert QA UI/UX Test Engineer for an insurance company.
+    Everything before the first '[' (the {"cases": wrapper) is skipped; each
+    object is decoded and validated as soon as its closing brace arrives, so a
+    malformed response is detected without waiting for the rest of the stream.
+    """
 
-Analyze the following BRD (Business Requirements Document) and generate EXACTLY {count} test cases focusing on UI/UX HAPPY PATH scenarios.
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._retry_from = 0  # Don't re-attempt decoding until a new '}' arrives
+        self._started = False
+        self.complete = False
+        self.error: Optional[str] = None
+        self.test_cases: List[Dict] = []
+
+    @property
+    def done(self) -> bool:
+        return self.complete or self.error is not None
+
+    @property
+    def remainder(self) -> str:
+        """Text fed after the array's closing ']' (once complete)"""
+        return self._buffer[1:] if self.complete else ''
+
+    def feed(self, text: str):
+        """Append streamed text and decode any test cases it completes"""
+        if self.done:
+            return
+        self._buffer += text
+
+        if not self._started:
+            start = self._buffer.find('[')
+            if start == -1:
+                return
+            self._started = True
+            self._pos = start + 1
+
+        buf = self._buffer
+        while True:
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            self._pos = pos
+            if pos >= len(buf):
+                break
+            if buf[pos] == ']':
+                self.complete = True
+                break
+            if buf[pos] != '{':
+                self.error = f"Failed to parse JSON: unexpected {buf[pos]!r} in test case array"
+                break
+            if buf.find('}', max(pos, self._retry_from)) == -1:
+                break
+            try:
+                tc, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                self._retry_from = len(buf)
+                break
+
+            # Validate each test case as it arrives
+            missing = REQUIRED_TC_FIELD_SET - tc.keys()
+            if missing:
+                self.error = f"Test case {len(self.test_cases) + 1} missing required field: {', '.join(sorted(missing))}"
+                return
+            self.test_cases.append(tc)
+            self._pos = end
+
+        # Drop consumed text so the buffer only holds the object in progress
+        self._buffer = buf[self._pos:]
+        self._retry_from = max(0, self._retry_from - self._pos)
+        self._pos = 0
+
+
+# Output groups of the combined single-call prompt, in batch order
+COMBINED_GROUPS = ('happy', 'validation', 'edge')
+
+# Key introducing a group's array in the combined response
+_GROUP_KEY_RE = {group: re.compile(rf'"{group}"\s*:\s*(?=\[)') for group in COMBINED_GROUPS}
+
+
+class _CombinedStreamParser:
+    """
+    Incrementally decode the combined {"happy": [...], "validation": [...], "edge": [...]} response
 
-BRD CONTENT:
-{brd_content}
+    Each group's array is decoded by its own _TestCaseStreamParser, in
+    COMBINED_GROUPS order, so when the response is cut off the complete
+    test cases of every group that had started are still available.
+    """
 
-FOCUS AREAS FOR THIS BATCH:
-1. Main user flows working correctly (navigation, form submission)
+    def __init__(self):
+        self._buffer = ''  # Text between two groups' arrays
+        self._index = 0
+        self._current: Optional[_TestCaseStreamParser] = None
+        self.error: Optional[str] = None
+        self.parsers: Dict[str, _TestCaseStreamParser] = {}
+
+    @property
+    def complete(self) -> bool:
+        return self._index == len(COMBINED_GROUPS)
+
+    @property
+    def done(self) -> bool:
+        return self.complete or self.error is not None
+
+    def feed(self, text: str):
+        """Append streamed text and decode any test cases it completes"""
+        while not self.done:
+            if self._current is None:
+                # Look for the next group's key
+                self._buffer += text
+                group = COMBINED_GROUPS[self._index]
+                match = _GROUP_KEY_RE[group].search(self._buffer)
+                if not match:
+                    return
+                text, self._buffer = self._buffer[match.end():], ''
+                self._current = self.parsers[group] = _TestCaseStreamParser()
+
+            self._current.feed(text)
+            if self._current.error:
+                self.error = self._current.error
+                return
+            if not self._current.complete:
+                return
+            text = self._current.remainder
+            self._current = None
+            self._index += 1
+
+    def group(self, group: str) -> Tuple[bool, List[Dict]]:
+        """(complete, test_cases) decoded so far for one group"""
+        parser = self.parsers.get(group)
+        if parser is None:
+            return False, []
+        return parser.complete, parser.test_cases
+
+
+def _dedupe_test_cases(test_cases: List[Dict]) -> List[Dict]:
+    """Drop test cases whose description repeats an earlier one (ignoring case and spacing)"""
+    unique, seen = [], set()
+    for tc in test_cases:
+        key = ' '.join(str(tc['description']).lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(tc)
+    return unique
+
+
+# JSON Schema of one test case (strict structured outputs need every property required)
+TEST_CASE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'description': {'type': 'string'},
+        'steps': {'type': 'string'},
+        'expected_result': {'type': 'string'},
+        'priority': {'type': 'string', 'enum': ['High', 'Medium', 'Low']}
+    },
+    'required': list(REQUIRED_TC_FIELDS),
+    'additionalProperties': False
+}
+
+# Models supporting json_schema structured outputs, by exact name: earlier
+# snapshots of the same family (e.g. gpt-4o-2024-05-13) only have JSON mode
+STRUCTURED_OUTPUT_MODELS = frozenset({
+    'gpt-4o', 'gpt-4o-2024-08-06', 'gpt-4o-2024-11-20',
+    'gpt-4o-mini', 'gpt-4o-mini-2024-07-18',
+    'gpt-4.1', 'gpt-4.1-2025-04-14',
+    'gpt-4.1-mini', 'gpt-4.1-mini-2025-04-14',
+    'gpt-4.1-nano', 'gpt-4.1-nano-2025-04-14'
+})
+
+# Models that rejected a json_schema request but accepted JSON mode (learned at runtime)
+_JSON_SCHEMA_REJECTED = set()
+
+
+def _response_format(model: str, groups: Tuple[str, ...] = ('cases',)) -> Dict:
+    """
+    Build the response_format for a test case request
+
+    Args:
+        model: Model the request is sent to
+        groups: Keys of the test case arrays in the response object
+
+    Returns:
+        json_schema response_format, or json_object for models without structured outputs
+    """
+    if model not in STRUCTURED_OUTPUT_MODELS or model in _JSON_SCHEMA_REJECTED:
+        return {"type": "json_object"}
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "test_cases",
+            "strict": True,
+            "schema": {
+                'type': 'object',
+                'properties': {group: {'type': 'array', 'items': TEST_CASE_SCHEMA} for group in groups},
+                'required': list(groups),
+                'additionalProperties': False
+            }
+        }
+    }
+
+
+# Output token budget for the combined prompt (roughly three batches' worth)
+COMBINED_MAX_TOKENS = 12000
+
+# BRDs longer than this (in tokens) are split into chunks generated in parallel,
+# instead of sending the whole document with every batch prompt
+BRD_CHUNK_TOKENS = 8000
+
+# Section starts: markdown headings or numbered headings ("2.", "3.1 Scope")
+_SECTION_RE = re.compile(r'^(?=#+\s|\d+(?:\.\d+)*\.?\s+\S)', re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """tiktoken encoding for a model (o200k_base for models tiktoken doesn't know)"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+
+def _count_tokens(text: str, model: str) -> int:
+    """Count tokens with tiktoken if installed, else estimate (~4 characters per token)"""
+    if tiktoken is None:
+        return len(text) // 4
+    return len(_get_encoding(model).encode(text, disallowed_special=()))
+
+
+def _chunk_brd(brd_content: str, model: str, max_tokens: int = BRD_CHUNK_TOKENS) -> List[str]:
+    """
+    Split a BRD into chunks of at most max_tokens, on section boundaries where possible
+
+    Sections are packed together until a chunk is full; a section that is
+    too long on its own is split on paragraphs, then hard-split by length.
+
+    Args:
+        brd_content: BRD document content
+        model: Model whose tokenizer is used for counting
+        max_tokens: Token budget per chunk
+
+    Returns:
+        List of chunk strings (a single chunk if the BRD fits)
+    """
+    pieces = []
+    for section in _SECTION_RE.split(brd_content):
+        if _count_tokens(section, model) <= max_tokens:
+            pieces.append(section)
+            continue
+        for paragraph in _PARAGRAPH_RE.split(section):
+            tokens = _count_tokens(paragraph, model)
+            if tokens <= max_tokens:
+                pieces.append(paragraph + '\n\n')
+                continue
+            step = max(1, len(paragraph) * max_tokens // tokens)
+            pieces.extend(paragraph[i:i + step] for i in range(0, len(paragraph), step))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = _count_tokens(piece, model)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(''.join(current).strip())
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(''.join(current).strip())
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def _split_count(total: int, weights: List[int]) -> List[int]:
+    """Split total proportionally to weights (largest remainder, sums exactly to total)"""
+    weight_sum = sum(weights)
+    if not weight_sum:
+        weights, weight_sum = [1] * len(weights), len(weights)
+    shares = [total * w / weight_sum for w in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+# Focus areas per batch (shared by the per-batch and combined prompts)
+FOCUS_UI_HAPPY_PATH = """1. Main user flows working correctly (navigation, form submission)
 2. UI elements displaying properly (buttons, fields, labels, images)
 3. Successful scenarios (user completes tasks without errors)
 4. Page transitions and navigation between screens
-5. Data display and presentation on UI
+5. Data display and presentation on UI"""
+
+FOCUS_UI_VALIDATION = """1. Form field validation (required fields, format validation, length limits)
+2. Input field behaviors (placeholder text, error messages, success indicators)
+3. Button states (enabled/disabled/loading states)
+4. Dropdown/select behaviors (options display, selection feedback)
+5. Checkbox/radio button interactions
+6. Error message display and formatting
+7. Tooltip and help text display
+8. User input feedback (typing indicators, character counters)"""
+
+FOCUS_UI_EDGE_CASES = """1. Boundary testing (max length inputs, special characters, very long text)
+2. Responsive design (mobile, tablet, desktop views)
+3. Browser compatibility (Chrome, Safari, Firefox, Edge)
+4. UI edge cases (window resize, zoom in/out, orientation change)
+5. Accessibility (keyboard navigation, tab order, screen reader support)
+6. Visual regression (layout breaks, overlapping elements, cut-off text)
+7. Empty states and loading states
+8. Performance UI feedback (slow loading, large data sets)"""
+
+
+# Prompt templates ($brd_content, $count; the focus areas are filled in once at
+# import by the f-strings). Every prompt starts with the same
+# role + BRD prefix and only differs after it, so OpenAI's automatic prompt
+# caching can reuse the BRD prefix across batches sent to the same model.
+PROMPT_PREFIX = """You are an expert QA UI/UX Test Engineer for an insurance company.
+
+BRD CONTENT:
+$brd_content
+
+"""
+
+# UI happy path batch
+_TPL_HAPPY = string.Template(PROMPT_PREFIX + f"""Analyze the BRD (Business Requirements Document) above and generate EXACTLY $count test cases focusing on UI/UX HAPPY PATH scenarios.
+
+FOCUS AREAS FOR THIS BATCH:
+{FOCUS_UI_HAPPY_PATH}
 
 TEST CASE REQUIREMENTS:
 - Focus ONLY on UI/UX testing (NOT backend/API/database)
@@ -68,53 +527,31 @@ TEST CASE REQUIREMENTS:
   * expected_result: What user sees on screen (UI feedback)
   * priority: "High" for critical UI flows, "Medium" for secondary
 
-OUTPUT FORMAT - MUST be valid JSON array ONLY:
-[
-  {{
-    "description": "Verify health insurance selection button displays and is clickable",
-    "steps": "1. Open the insurance selection page\\n2. Locate the 'Health Insurance' button\\n3. Verify button is visible and enabled\\n4. Click on the button",
-    "expected_result": "Button changes color on hover, page navigates to health insurance form, form fields are displayed correctly",
-    "priority": "High"
-  }},
-  ...
-]
+OUTPUT FORMAT - JSON object with a "cases" array:
+{{
+  "cases": [
+    {{
+      "description": "Verify health insurance selection button displays and is clickable",
+      "steps": "1. Open the insurance selection page\\n2. Locate the 'Health Insurance' button\\n3. Verify button is visible and enabled\\n4. Click on the button",
+      "expected_result": "Button changes color on hover, page navigates to health insurance form, form fields are displayed correctly",
+      "priority": "High"
+    }},
+    ...
+  ]
+}}
 
 IMPORTANT:
-- Output ONLY the JSON array, no markdown, no explanations
-- Generate EXACTLY {count} test cases
+- Generate EXACTLY $count test cases
 - Use Vietnamese if BRD is in Vietnamese
 - Focus on UI elements, user interactions, visual verification
 - NO technical/backend testing (no API, database, server tests)
-"""
-        return prompt
-
-    def _create_prompt_ui_validation(self, brd_content: str, count: int = 30) -> str:
-        """
-        Create prompt for generating UI Validation & Interaction test cases
+""")
 
-        Args:
-            brd_content: BRD document content
-            count: Number of test cases to generate
-
-        Returns:
-            Formatted prompt string
-        """
-        prompt = f"""You are an expert QA UI/UX Test Engineer for an insurance company.
-
-Analyze the following BRD (Business Requirements Document) and generate EXACTLY {count} test cases focusing on UI VALIDATION & USER INTERACTIONS.
-
-BRD CONTENT:
-{brd_content}
+# UI validation & interaction batch
+_TPL_VALIDATION = string.Template(PROMPT_PREFIX + f"""Analyze the BRD (Business Requirements Document) above and generate EXACTLY $count test cases focusing on UI VALIDATION & USER INTERACTIONS.
 
 FOCUS AREAS FOR THIS BATCH:
-1. Form field validation (required fields, format validation, length limits)
-2. Input field behaviors (placeholder text, error messages, success indicators)
-3. Button states (enabled/disabled/loading states)
-4. Dropdown/select behaviors (options display, selection feedback)
-5. Checkbox/radio button interactions
-6. Error message display and formatting
-7. Tooltip and help text display
-8. User input feedback (typing indicators, character counters)
+{FOCUS_UI_VALIDATION}
 
 TEST CASE REQUIREMENTS:
 - Focus on UI VALIDATION and USER INTERACTION feedback
@@ -128,53 +565,31 @@ TEST CASE REQUIREMENTS:
   * expected_result: UI feedback user sees (error messages, visual indicators)
   * priority: "Medium" for most validation tests
 
-OUTPUT FORMAT - MUST be valid JSON array ONLY:
-[
-  {{
-    "description": "Verify error message displays when required field is left empty",
-    "steps": "1. Open insurance application form\\n2. Leave 'Full Name' field empty\\n3. Click Submit button\\n4. Observe error message",
-    "expected_result": "Red error message appears below field stating 'Full Name is required', field border turns red, submit button remains enabled",
-    "priority": "Medium"
-  }},
-  ...
-]
+OUTPUT FORMAT - JSON object with a "cases" array:
+{{
+  "cases": [
+    {{
+      "description": "Verify error message displays when required field is left empty",
+      "steps": "1. Open insurance application form\\n2. Leave 'Full Name' field empty\\n3. Click Submit button\\n4. Observe error message",
+      "expected_result": "Red error message appears below field stating 'Full Name is required', field border turns red, submit button remains enabled",
+      "priority": "Medium"
+    }},
+    ...
+  ]
+}}
 
 IMPORTANT:
-- Output ONLY the JSON array, no markdown, no explanations
-- Generate EXACTLY {count} test cases
+- Generate EXACTLY $count test cases
 - Use Vietnamese if BRD is in Vietnamese
 - Focus on UI validation feedback, not backend validation
 - Test visual feedback user sees on screen
-"""
-        return prompt
-
-    def _create_prompt_ui_edge_cases(self, brd_content: str, count: int = 30) -> str:
-        """
-        Create prompt for generating UI Edge Cases & Responsive test cases
-
-        Args:
-            brd_content: BRD document content
-            count: Number of test cases to generate
+""")
 
-        Returns:
-            Formatted prompt string
-        """
-        prompt = f"""You are an expert QA UI/UX Test Engineer for an insurance company.
-
-Analyze the following BRD (Business Requirements Document) and generate EXACTLY {count} test cases focusing on UI EDGE CASES, RESPONSIVE DESIGN, and CROSS-BROWSER testing.
-
-BRD CONTENT:
-{brd_content}
+# UI edge case & responsive batch
+_TPL_EDGE = string.Template(PROMPT_PREFIX + f"""Analyze the BRD (Business Requirements Document) above and generate EXACTLY $count test cases focusing on UI EDGE CASES, RESPONSIVE DESIGN, and CROSS-BROWSER testing.
 
 FOCUS AREAS FOR THIS BATCH:
-1. Boundary testing (max length inputs, special characters, very long text)
-2. Responsive design (mobile, tablet, desktop views)
-3. Browser compatibility (Chrome, Safari, Firefox, Edge)
-4. UI edge cases (window resize, zoom in/out, orientation change)
-5. Accessibility (keyboard navigation, tab order, screen reader support)
-6. Visual regression (layout breaks, overlapping elements, cut-off text)
-7. Empty states and loading states
-8. Performance UI feedback (slow loading, large data sets)
+{FOCUS_UI_EDGE_CASES}
 
 TEST CASE REQUIREMENTS:
 - Focus on EDGE CASES and CROSS-DEVICE testing
@@ -188,42 +603,243 @@ TEST CASE REQUIREMENTS:
   * expected_result: UI behavior and layout expectations
   * priority: "Medium" or "Low" based on criticality
 
-OUTPUT FORMAT - MUST be valid JSON array ONLY:
-[
-  {{
-    "description": "Verify form layout remains intact when browser window is resized to tablet width (768px)",
-    "steps": "1. Open insurance form on desktop browser\\n2. Resize browser window to 768px width\\n3. Observe form layout and field alignment\\n4. Try filling and submitting form",
-    "expected_result": "Form fields stack vertically, buttons remain visible and clickable, no horizontal scrolling, all text remains readable, no overlapping elements",
-    "priority": "Medium"
-  }},
-  ...
-]
+OUTPUT FORMAT - JSON object with a "cases" array:
+{{
+  "cases": [
+    {{
+      "description": "Verify form layout remains intact when browser window is resized to tablet width (768px)",
+      "steps": "1. Open insurance form on desktop browser\\n2. Resize browser window to 768px width\\n3. Observe form layout and field alignment\\n4. Try filling and submitting form",
+      "expected_result": "Form fields stack vertically, buttons remain visible and clickable, no horizontal scrolling, all text remains readable, no overlapping elements",
+      "priority": "Medium"
+    }},
+    ...
+  ]
+}}
 
 IMPORTANT:
-- Output ONLY the JSON array, no markdown, no explanations
-- Generate EXACTLY {count} test cases
+- Generate EXACTLY $count test cases
 - Use Vietnamese if BRD is in Vietnamese
 - Focus on UI edge cases, responsive behavior, visual consistency
 - Test cross-device and cross-browser UI rendering
-"""
-        return prompt
+""")
+
+# All three batches in one request
+_TPL_COMBINED = string.Template(PROMPT_PREFIX + f"""Analyze the BRD (Business Requirements Document) above and generate three groups of UI/UX test cases.
+
+GROUP "happy" - EXACTLY $happy_count UI/UX HAPPY PATH test cases:
+{FOCUS_UI_HAPPY_PATH}
+
+GROUP "validation" - EXACTLY $validation_count UI VALIDATION & USER INTERACTION test cases:
+{FOCUS_UI_VALIDATION}
+
+GROUP "edge" - EXACTLY $edge_count UI EDGE CASES, RESPONSIVE DESIGN and CROSS-BROWSER test cases:
+{FOCUS_UI_EDGE_CASES}
+
+TEST CASE REQUIREMENTS:
+- Focus ONLY on UI/UX testing (NOT backend/API/database)
+- Describe WHAT USER SEES and WHAT USER DOES on the UI
+- Each test case MUST include:
+  * description: Clear UI-focused description
+  * steps: Detailed UI interaction steps (use \\n for line breaks)
+  * expected_result: What user sees on screen (UI feedback)
+  * priority: "High", "Medium" or "Low"
+
+OUTPUT FORMAT - JSON object with one array per group:
+{{
+  "happy": [{{"description": "...", "steps": "...", "expected_result": "...", "priority": "High"}}, ...],
+  "validation": [...],
+  "edge": [...]
+}}
+
+IMPORTANT:
+- Use Vietnamese if BRD is in Vietnamese
+- NO technical/backend testing (no API, database, server tests)
+""")
+
+
+# Request all three batches in one call by default (needs a 'combined' model
+# allowing COMBINED_MAX_TOKENS output tokens)
+SINGLE_CALL = os.getenv('OPENAI_SINGLE_CALL', 'False').lower() == 'true'
+
 
-    def _call_chatgpt(self, prompt: str, max_tokens: int = 4000) -> Tuple[bool, str, Optional[str]]:
+def get_model_routing(model: Optional[str] = None) -> Dict[str, str]:
+    """
+    Model used for each batch ('happy', 'validation', 'edge') and the single-call prompt ('combined')
+
+    Happy-path and validation batches go to a cheap model (OPENAI_MODEL_CHEAP),
+    edge cases to a strong one (OPENAI_MODEL_STRONG); the combined prompt uses
+    OPENAI_MODEL_COMBINED. Unset strong/combined models default to the main model.
+
+    Args:
+        model: Main model (if None, loads OPENAI_MODEL from environment)
+
+    Returns:
+        Dictionary of batch name -> model
+    """
+    model = model or os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+    cheap_model = os.getenv('OPENAI_MODEL_CHEAP', 'gpt-4o-mini')
+    return {
+        'happy': cheap_model,
+        'validation': cheap_model,
+        'edge': os.getenv('OPENAI_MODEL_STRONG', model),
+        'combined': os.getenv('OPENAI_MODEL_COMBINED', model)
+    }
+
+
+class ChatGPTService:
+    """Service to interact with OpenAI ChatGPT API"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        models: Optional[Dict[str, str]] = None,
+        single_call: bool = SINGLE_CALL
+    ):
+        """
+        Initialize ChatGPT service
+
+        Args:
+            api_key: OpenAI API key (if None, loads from environment)
+            model: Model to use (if None, loads from environment)
+            models: Model per batch, overriding get_model_routing() ('happy',
+                'validation', 'edge', 'combined')
+            single_call: Default for generate_test_cases(single_call=...)
+        """
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.model = model or os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+        self.models = {**get_model_routing(self.model), **(models or {})}
+        self.single_call = single_call
+
+        if not self.api_key:
+            raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in .env file")
+
+        # Retries are handled by _create_completion (with rate limiting and backoff)
+        self.client = AsyncOpenAI(api_key=self.api_key, http_client=_SHARED_HTTP, max_retries=0)
+
+    @classmethod
+    def close(cls):
+        """Close the shared HTTP connection pool on the loop that uses it (registered with atexit)"""
+        if _loop is None or _SHARED_HTTP.is_closed:
+            return
+        _run_sync(_SHARED_HTTP.aclose())
+
+    def _create_prompt_ui_happy_path(self, brd_content: str, count: int = 30) -> str:
+        """
+        Create prompt for generating UI Happy Path test cases
+
+        Args:
+            brd_content: BRD document content
+            count: Number of test cases to generate
+
+        Returns:
+            Formatted prompt string
+        """
+        return _TPL_HAPPY.substitute(brd_content=brd_content, count=count)
+
+    def _create_prompt_ui_validation(self, brd_content: str, count: int = 30) -> str:
+        """
+        Create prompt for generating UI Validation & Interaction test cases
+
+        Args:
+            brd_content: BRD document content
+            count: Number of test cases to generate
+
+        Returns:
+            Formatted prompt string
+        """
+        return _TPL_VALIDATION.substitute(brd_content=brd_content, count=count)
+
+    def _create_prompt_ui_edge_cases(self, brd_content: str, count: int = 30) -> str:
+        """
+        Create prompt for generating UI Edge Cases & Responsive test cases
+
+        Args:
+            brd_content: BRD document content
+            count: Number of test cases to generate
+
+        Returns:
+            Formatted prompt string
+        """
+        return _TPL_EDGE.substitute(brd_content=brd_content, count=count)
+
+    def _create_prompt_ui_combined(self, brd_content: str, counts: Tuple[int, int, int] = (30, 30, 30)) -> str:
+        """
+        Create a single prompt covering all three batches
+
+        The model returns one JSON object with the three test case groups,
+        so the BRD is sent (and billed) once instead of three times.
+
+        Args:
+            brd_content: BRD document content
+            counts: Number of (happy path, validation, edge case) test cases
+
+        Returns:
+            Formatted prompt string
         """
-        Call ChatGPT API
+        happy_count, validation_count, edge_count = counts
+        return _TPL_COMBINED.substitute(
+            brd_content=brd_content,
+            happy_count=happy_count,
+            validation_count=validation_count,
+            edge_count=edge_count
+        )
+
+    @retry(
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        wait=_wait_retry_after,
+        stop=stop_after_attempt(MAX_API_ATTEMPTS),
+        reraise=True
+    )
+    async def _create_completion(self, **kwargs):
+        """Create a chat completion, rate limited and retried on transient errors"""
+        await _rate_limiter.acquire()
+        return await self.client.chat.completions.create(**kwargs)
+
+    async def _acall_chatgpt(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict] = None,
+        use_cache: bool = True,
+        model: Optional[str] = None,
+        parser: Optional[Union[_TestCaseStreamParser, _CombinedStreamParser]] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Call ChatGPT API (async, so independent batches can run concurrently)
+
+        The response is streamed; if a parser is given, each chunk is fed to it
+        as it arrives and the stream is abandoned as soon as the parser fails.
+        Only responses that finished normally (not cut off at max_tokens) and,
+        with a parser, parsed into a complete array are cached.
 
         Args:
             prompt: Prompt to send
             max_tokens: Maximum tokens in response
+            response_format: OpenAI response_format (default: {"cases": [...]} schema for the model)
+            use_cache: Return a cached response for the same model + prompt if available
+            model: Model to use (default: self.model)
+            parser: Optional incremental parser to feed the response text to
 
         Returns:
             Tuple of (success, response_text, error_message)
         """
+        model = model or self.model
+        response_format = response_format or _response_format(model)
+        cache_key = _response_cache_key(model, prompt)
+        if use_cache:
+            cached = _read_cached_response(cache_key)
+            if cached is not None:
+                logger.debug("Using cached ChatGPT response (%s)", model)
+                if parser is not None:
+                    parser.feed(cached)
+                return True, cached, None
+
         try:
-            print(f"🤖 Calling ChatGPT API ({self.model})...")
+            logger.debug("Calling ChatGPT API (%s)", model)
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            request = dict(
+                model=model,
                 messages=[
                     {
                         "role": "system",
@@ -235,22 +851,70 @@ IMPORTANT:
                     }
                 ],
                 max_tokens=max_tokens,
-                temperature=0.7  # Balanced creativity and consistency
+                temperature=0.7,  # Balanced creativity and consistency
+                stream=True,
+                stream_options={"include_usage": True},
+                response_format=response_format
             )
-
-            response_text = response.choices[0].message.content
+            try:
+                stream = await self._create_completion(**request)
+            except BadRequestError as e:
+                if response_format.get('type') != 'json_schema':
+                    raise
+                # Model (or deployment) without structured outputs: retry in JSON mode
+                logger.warning("%s rejected the json_schema response format (%s), retrying in JSON mode", model, e)
+                stream = await self._create_completion(**{**request, 'response_format': {"type": "json_object"}})
+                _JSON_SCHEMA_REJECTED.add(model)
+
+            parts = []
+            usage = None
+            finish_reason = None
+            aborted = False
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage  # Sent in the final chunk (no choices)
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                if parser is not None:
+                    parser.feed(delta)
+                    if parser.error:
+                        aborted = True
+                        break
+
+            response_text = ''.join(parts)
+
+            if aborted:
+                # Stop generating (and paying for) a response we already know is invalid
+                await stream.close()
+                logger.warning("Aborted ChatGPT stream (%s): %s", model, parser.error)
+                return True, response_text, None
 
             # Log token usage
-            print(f"✓ API call successful")
-            print(f"  - Input tokens: {response.usage.prompt_tokens}")
-            print(f"  - Output tokens: {response.usage.completion_tokens}")
-            print(f"  - Total tokens: {response.usage.total_tokens}")
+            if usage is not None:
+                logger.debug(
+                    "ChatGPT API call successful (%s): input=%d (cached=%d) output=%d total=%d tokens",
+                    model,
+                    usage.prompt_tokens,
+                    getattr(usage.prompt_tokens_details, 'cached_tokens', None) or 0,
+                    usage.completion_tokens,
+                    usage.total_tokens
+                )
+
+            if finish_reason != 'stop':
+                logger.warning("ChatGPT response did not finish normally (%s): %s", model, finish_reason)
+            elif parser is None or parser.complete:
+                _write_cached_response(cache_key, response_text)
 
             return True, response_text, None
 
         except Exception as e:
             error_msg = f"ChatGPT API error: {str(e)}"
-            print(f"✗ {error_msg}")
+            logger.error(error_msg)
             return False, "", error_msg
 
     def _parse_test_cases(self, response_text: str) -> Tuple[bool, List[Dict], Optional[str]]:
@@ -264,31 +928,22 @@ IMPORTANT:
             Tuple of (success, test_cases_list, error_message)
         """
         try:
-            # Remove markdown code blocks if present
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```'):
-                # Remove ```json or ``` at start
-                cleaned_text = cleaned_text.split('\n', 1)[1] if '\n' in cleaned_text else cleaned_text[3:]
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text.rsplit('```', 1)[0]
+            # Responses are JSON objects (structured outputs / JSON mode), never fenced
+            data = _json_loads(response_text)
 
-            cleaned_text = cleaned_text.strip()
-
-            # Parse JSON
-            test_cases = json.loads(cleaned_text)
+            test_cases = data.get('cases') if isinstance(data, dict) else None
 
             # Validate it's a list
             if not isinstance(test_cases, list):
-                return False, [], "Response is not a JSON array"
+                return False, [], 'Response has no "cases" JSON array'
 
             # Validate each test case has required fields
-            required_fields = ['description', 'steps', 'expected_result', 'priority']
             for i, tc in enumerate(test_cases):
-                for field in required_fields:
-                    if field not in tc:
-                        return False, [], f"Test case {i+1} missing required field: {field}"
+                missing = REQUIRED_TC_FIELD_SET - tc.keys()
+                if missing:
+                    return False, [], f"Test case {i+1} missing required field: {', '.join(sorted(missing))}"
 
-            print(f"✓ Successfully parsed {len(test_cases)} test cases")
+            logger.debug("Parsed %d test cases", len(test_cases))
             return True, test_cases, None
 
         except json.JSONDecodeError as e:
@@ -296,11 +951,31 @@ IMPORTANT:
         except Exception as e:
             return False, [], f"Parsing error: {str(e)}"
 
+    def _parse_test_cases_stream(self, parser: _TestCaseStreamParser) -> Tuple[bool, List[Dict], Optional[str]]:
+        """
+        Collect the test cases decoded by a streaming parser
+
+        Args:
+            parser: Parser that was fed the full (or aborted) response
+
+        Returns:
+            Tuple of (success, test_cases_list, error_message)
+        """
+        if parser.error:
+            return False, [], parser.error
+        if not parser.complete:
+            return False, [], "Failed to parse JSON: response is not a complete JSON array"
+
+        logger.debug("Parsed %d test cases", len(parser.test_cases))
+        return True, parser.test_cases, None
+
     def generate_test_cases(
         self,
         brd_content: str,
         target_count: int = 90,
-        batch_mode: bool = True
+        batch_mode: bool = True,
+        single_call: Optional[bool] = None,
+        use_cache: bool = True
     ) -> Tuple[bool, List[Dict], Optional[str]]:
         """
         Generate UI/UX test cases from BRD content using 3-batch strategy
@@ -309,111 +984,291 @@ IMPORTANT:
             brd_content: BRD document text content
             target_count: Target number of test cases (default: 90, recommended: 70-90)
             batch_mode: If True, generates in 3 batches (UI Happy + Validation + Edge Cases)
+            single_call: If True (with batch mode), request all 3 batches in one API call
+                to the 'combined' model; batches it doesn't return in full are then requested
+                separately (default: self.single_call, see OPENAI_SINGLE_CALL)
+            use_cache: If True, reuse cached responses for identical prompts (see CACHE_DIR)
+
+        Returns:
+            Tuple of (success, test_cases_list, error_message)
+        """
+        if single_call is None:
+            single_call = self.single_call
+        return _run_sync(self._agenerate_test_cases(brd_content, target_count, batch_mode, single_call, use_cache))
+
+    async def _agenerate_test_cases(
+        self,
+        brd_content: str,
+        target_count: int,
+        batch_mode: bool,
+        single_call: bool = False,
+        use_cache: bool = True
+    ) -> Tuple[bool, List[Dict], Optional[str]]:
+        """
+        Async implementation of generate_test_cases
+
+        The three batches only share the BRD content, so their API calls are
+        issued concurrently; results are then combined in batch order with
+        the same partial-success rules as before (batch 1 is required, a
+        failed batch 2 or 3 truncates the result to the preceding batches).
+        With single_call, one combined request is tried first; only the
+        batches it doesn't return in full are then requested separately,
+        for the test cases still missing.
 
         Returns:
             Tuple of (success, test_cases_list, error_message)
         """
         all_test_cases = []
 
+        if _count_tokens(brd_content, self.model) > BRD_CHUNK_TOKENS:
+            chunks = _chunk_brd(brd_content, self.model)
+            if len(chunks) > 1:
+                return await self._agenerate_chunked(chunks, target_count, batch_mode, use_cache)
+
         if batch_mode and target_count >= 70:
             # 3-BATCH STRATEGY for 70-90 test cases
-            batch1_count = 30  # UI Happy Path
-            batch2_count = 30  # UI Validation & Interactions
-            batch3_count = target_count - 60  # UI Edge Cases & Responsive (30 if target=90)
-
-            print(f"\n{'='*70}")
-            print(f"UI/UX TEST GENERATION STRATEGY - {target_count} test cases")
-            print(f"{'='*70}")
-            print(f"  Batch 1: {batch1_count} UI Happy Path test cases")
-            print(f"  Batch 2: {batch2_count} UI Validation & Interaction test cases")
-            print(f"  Batch 3: {batch3_count} UI Edge Cases & Responsive test cases")
-            print(f"{'='*70}\n")
-
-            # ========== BATCH 1: UI Happy Path ==========
-            print(f"\n{'='*70}")
-            print(f"BATCH 1: Generating {batch1_count} UI HAPPY PATH test cases")
-            print(f"{'='*70}")
-
-            prompt1 = self._create_prompt_ui_happy_path(brd_content, batch1_count)
-            success1, response1, error1 = self._call_chatgpt(prompt1)
-
-            if not success1:
-                return False, [], error1
-
-            success_parse1, happy_cases, parse_error1 = self._parse_test_cases(response1)
-            if not success_parse1:
-                return False, [], parse_error1
-
-            all_test_cases.extend(happy_cases)
-            print(f"✓ Batch 1 completed: {len(happy_cases)} test cases")
-
-            # ========== BATCH 2: UI Validation & Interactions ==========
-            print(f"\n{'='*70}")
-            print(f"BATCH 2: Generating {batch2_count} UI VALIDATION test cases")
-            print(f"{'='*70}")
-
-            prompt2 = self._create_prompt_ui_validation(brd_content, batch2_count)
-            success2, response2, error2 = self._call_chatgpt(prompt2)
-
-            if not success2:
-                # If second batch fails, return first batch only
-                print(f"Batch 2 failed, returning {len(all_test_cases)} test cases from Batch 1")
-                return True, all_test_cases, "Batch 2 failed but Batch 1 succeeded"
-
-            success_parse2, validation_cases, parse_error2 = self._parse_test_cases(response2)
-            if not success_parse2:
-                print(f"Batch 2 parsing failed, returning {len(all_test_cases)} test cases from Batch 1")
-                return True, all_test_cases, "Batch 2 parsing failed but Batch 1 succeeded"
-
-            all_test_cases.extend(validation_cases)
-            print(f"✓ Batch 2 completed: {len(validation_cases)} test cases")
-
-            # ========== BATCH 3: UI Edge Cases & Responsive ==========
-            print(f"\n{'='*70}")
-            print(f"BATCH 3: Generating {batch3_count} UI EDGE CASES & RESPONSIVE test cases")
-            print(f"{'='*70}")
-
-            prompt3 = self._create_prompt_ui_edge_cases(brd_content, batch3_count)
-            success3, response3, error3 = self._call_chatgpt(prompt3, max_tokens=4000)
-
-            if not success3:
-                # If third batch fails, return first two batches
-                print(f"Batch 3 failed, returning {len(all_test_cases)} test cases from Batch 1+2")
-                return True, all_test_cases, "Batch 3 failed but Batch 1+2 succeeded"
-
-            success_parse3, edge_cases, parse_error3 = self._parse_test_cases(response3)
-            if not success_parse3:
-                print(f"Batch 3 parsing failed, returning {len(all_test_cases)} test cases from Batch 1+2")
-                return True, all_test_cases, "Batch 3 parsing failed but Batch 1+2 succeeded"
-
-            all_test_cases.extend(edge_cases)
-            print(f"✓ Batch 3 completed: {len(edge_cases)} test cases")
+            counts = {
+                'happy': 30,  # UI Happy Path
+                'validation': 30,  # UI Validation & Interactions
+                'edge': target_count - 60  # UI Edge Cases & Responsive (30 if target=90)
+            }
+            results = {}  # batch -> (success, test_cases, error)
+            partial = {}  # batch -> test cases decoded from a truncated combined response
+
+            if single_call:
+                # All three batches in one request: the BRD is sent only once
+                logger.info("Generating %d UI/UX test cases in one call (%s)", target_count, self.models['combined'])
+                for group, (complete, test_cases) in (await self._agenerate_combined(brd_content, counts, use_cache)).items():
+                    if complete:
+                        results[group] = (True, test_cases, None)
+                    elif test_cases:
+                        partial[group] = test_cases
+
+            # Request whatever the combined call didn't return in full
+            missing = {
+                group: count - len(partial.get(group, []))
+                for group, count in counts.items() if group not in results
+            }
+            if single_call and missing:
+                logger.warning("Single-call generation incomplete, requesting %s separately", missing)
+            results.update(await self._agenerate_batches(brd_content, missing, use_cache))
+
+            for group, test_cases in partial.items():
+                success, more_cases, error = results[group]
+                if not success:
+                    logger.warning("Batch %s failed (%s), keeping %d test cases from the combined call", group, error, len(test_cases))
+                results[group] = (True, _dedupe_test_cases(test_cases + (more_cases if success else [])), None)
+
+            # Combine in batch order: batch 1 is required, a failed batch 2 or 3
+            # truncates the result to the preceding batches
+            for index, group in enumerate(COMBINED_GROUPS, start=1):
+                success, test_cases, error = results[group]
+                if not success:
+                    if index == 1:
+                        return False, [], error
+                    succeeded = '+'.join(str(i) for i in range(1, index))
+                    logger.warning("Batch %d failed (%s), returning %d test cases from Batch %s", index, error, len(all_test_cases), succeeded)
+                    return True, all_test_cases, f"Batch {index} failed but Batch {succeeded} succeeded"
+
+                all_test_cases.extend(test_cases)
+                logger.info("Batch %d completed: %d test cases", index, len(test_cases))
 
         else:
             # Single batch mode (for targets < 70)
-            print(f"\n{'='*70}")
-            print(f"Generating {target_count} test cases (single batch mode)")
-            print(f"{'='*70}")
+            logger.info("Generating %d test cases (single batch mode)", target_count)
 
             prompt = self._create_prompt_ui_happy_path(brd_content, target_count)
-            success, response, error = self._call_chatgpt(prompt, max_tokens=4000)
+            parser = _TestCaseStreamParser()
+            success, response, error = await self._acall_chatgpt(
+                prompt, max_tokens=4000, use_cache=use_cache, parser=parser
+            )
 
             if not success:
                 return False, [], error
 
-            success_parse, test_cases, parse_error = self._parse_test_cases(response)
+            success_parse, test_cases, parse_error = self._parse_test_cases_stream(parser)
             if not success_parse:
                 return False, [], parse_error
 
             all_test_cases = test_cases
 
-        print(f"\n{'='*70}")
-        print(f"TOTAL GENERATED: {len(all_test_cases)} UI/UX test cases")
-        print(f"{'='*70}\n")
+        logger.info("Generated %d UI/UX test cases", len(all_test_cases))
+
+        return True, all_test_cases, None
+
+    async def _agenerate_combined(
+        self,
+        brd_content: str,
+        counts: Dict[str, int],
+        use_cache: bool = True
+    ) -> Dict[str, Tuple[bool, List[Dict]]]:
+        """
+        Generate all three batches with one combined prompt
+
+        The response is parsed as it streams, so if it is cut off or fails
+        part-way the complete test cases received so far are still returned.
+
+        Args:
+            brd_content: BRD document content
+            counts: Number of test cases per batch ('happy', 'validation', 'edge')
+            use_cache: Reuse cached responses
+
+        Returns:
+            Dictionary of batch -> (complete, test_cases_list)
+        """
+        model = self.models['combined']
+        parser = _CombinedStreamParser()
+        success, _, error = await self._acall_chatgpt(
+            self._create_prompt_ui_combined(brd_content, tuple(counts[group] for group in COMBINED_GROUPS)),
+            max_tokens=COMBINED_MAX_TOKENS,
+            response_format=_response_format(model, COMBINED_GROUPS),
+            use_cache=use_cache,
+            model=model,
+            parser=parser
+        )
+        if not success or parser.error:
+            logger.warning("Single-call generation failed: %s", error or parser.error)
+
+        return {group: parser.group(group) for group in COMBINED_GROUPS}
+
+    async def _agenerate_batches(
+        self,
+        brd_content: str,
+        counts: Dict[str, int],
+        use_cache: bool = True
+    ) -> Dict[str, Tuple[bool, List[Dict], Optional[str]]]:
+        """
+        Request batches concurrently, each from its own prompt and model
+
+        Args:
+            brd_content: BRD document content
+            counts: Number of test cases per batch ('happy', 'validation', 'edge')
+            use_cache: Reuse cached responses
+
+        Returns:
+            Dictionary of batch -> (success, test_cases_list, error_message)
+        """
+        if not counts:
+            return {}
+
+        create_prompt = {
+            'happy': self._create_prompt_ui_happy_path,
+            'validation': self._create_prompt_ui_validation,
+            'edge': self._create_prompt_ui_edge_cases
+        }
+        logger.info(
+            "Generating UI/UX test case batches: %s",
+            ', '.join(f"{count} {group} ({self.models[group]})" for group, count in counts.items())
+        )
+
+        # Run the batches concurrently, parsing each response as it streams
+        parsers = {group: _TestCaseStreamParser() for group in counts}
+        responses = await asyncio.gather(
+            *(
+                self._acall_chatgpt(
+                    create_prompt[group](brd_content, count),
+                    use_cache=use_cache,
+                    model=self.models[group],
+                    parser=parsers[group]
+                )
+                for group, count in counts.items()
+            ),
+            return_exceptions=True
+        )
+
+        results = {}
+        for group, response in zip(counts, responses):
+            if isinstance(response, BaseException):
+                results[group] = (False, [], f"ChatGPT API error: {str(response)}")
+                continue
+            success, _, error = response
+            results[group] = self._parse_test_cases_stream(parsers[group]) if success else (False, [], error)
+        return results
+
+    async def _agenerate_chunked(
+        self,
+        chunks: List[str],
+        target_count: int,
+        batch_mode: bool,
+        use_cache: bool = True
+    ) -> Tuple[bool, List[Dict], Optional[str]]:
+        """
+        Generate test cases for a long BRD, one set of batch prompts per chunk
+
+        The target count is shared between chunks in proportion to their
+        length, and each chunk's share between the batches. Every prompt
+        runs concurrently; results are ordered by batch, then chunk, and
+        test cases with the same description are dropped.
+
+        Args:
+            chunks: BRD chunks from _chunk_brd
+            target_count: Total number of test cases to generate
+            batch_mode: Use the 3-batch strategy (for targets >= 70)
+            use_cache: Reuse cached responses
+
+        Returns:
+            Tuple of (success, test_cases_list, error_message)
+        """
+        batches = [('happy', self._create_prompt_ui_happy_path)]
+        if batch_mode and target_count >= 70:
+            batches += [('validation', self._create_prompt_ui_validation), ('edge', self._create_prompt_ui_edge_cases)]
+
+        logger.info(
+            "Generating %d UI/UX test cases from %d BRD chunks (%d batches each)",
+            target_count, len(chunks), len(batches)
+        )
+
+        jobs = []  # (batch index, prompt, model)
+        for chunk, chunk_count in zip(chunks, _split_count(target_count, [len(c) for c in chunks])):
+            for index, ((batch, create_prompt), count) in enumerate(zip(batches, _split_count(chunk_count, [1] * len(batches)))):
+                if count:
+                    jobs.append((index, create_prompt(chunk, count), self.models[batch]))
+
+        parsers = [_TestCaseStreamParser() for _ in jobs]
+        responses = await asyncio.gather(
+            *(
+                self._acall_chatgpt(prompt, use_cache=use_cache, model=model, parser=parser)
+                for (_, prompt, model), parser in zip(jobs, parsers)
+            ),
+            return_exceptions=True
+        )
+
+        grouped = [[] for _ in batches]
+        errors = []
+        for (index, _, _), parser, response in zip(jobs, parsers, responses):
+            if isinstance(response, BaseException):
+                errors.append(f"ChatGPT API error: {str(response)}")
+                continue
+            success, _, error = response
+            if success:
+                success, test_cases, error = self._parse_test_cases_stream(parser)
+            if not success:
+                errors.append(error)
+                continue
+            grouped[index].extend(test_cases)
+
+        all_test_cases = _dedupe_test_cases([tc for test_cases in grouped for tc in test_cases])
+
+        if not all_test_cases:
+            return False, [], errors[0] if errors else "No test cases generated"
+
+        logger.info("Generated %d UI/UX test cases", len(all_test_cases))
+        if errors:
+            logger.warning("%d of %d chunk batches failed: %s", len(errors), len(jobs), errors[0])
+            return True, all_test_cases, f"{len(errors)} of {len(jobs)} chunk batches failed"
 
         return True, all_test_cases, None
 
 
+atexit.register(ChatGPTService.close)
+
+
+@functools.lru_cache(maxsize=1)
+def get_chatgpt_service() -> ChatGPTService:
+    """Shared service configured from the environment (built on first use, then reused)"""
+    return ChatGPTService()
+
+
 # Convenience function
 def generate_testcases_from_brd(brd_content: str, target_count: int = 90) -> Tuple[bool, List[Dict], Optional[str]]:
     """
@@ -426,5 +1281,4 @@ def generate_testcases_from_brd(brd_content: str, target_count: int = 90) -> Tup
     Returns:
         Tuple of (success, test_cases_list, error_message)
     """
-    service = ChatGPTService()
-    return service.generate_test_cases(brd_content, target_count)
\ No newline at end of file
+    return get_chatgpt_service().generate_test_cases(brd_content, target_count)
\ No newline at end of file
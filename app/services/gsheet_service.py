@@ -2,13 +2,68 @@
 Google Sheets Service
 Write test cases to Google Sheets with multiple worksheet support
 """
+import logging
 import gspread
+from gspread.utils import absolute_range_name
 from google.oauth2.service_account import Credentials
 from typing import List, Dict, Optional, Tuple
 import os
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
+logger = logging.getLogger(__name__)
+
+
+# Row 1: BRD title (merged, large, centered, bold)
+TITLE_FORMAT = {
+    'backgroundColor': {'red': 0.4, 'green': 0.2, 'blue': 0.8},  # Purple
+    'textFormat': {
+        'bold': True,
+        'fontSize': 14,
+        'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}  # White text
+    },
+    'horizontalAlignment': 'CENTER',
+    'verticalAlignment': 'MIDDLE'
+}
+
+# Row 3: Header row (bold, blue background)
+HEADER_FORMAT = {
+    'backgroundColor': {'red': 0.2, 'green': 0.4, 'blue': 0.8},  # Blue
+    'textFormat': {
+        'bold': True,
+        'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}
+    },
+    'horizontalAlignment': 'CENTER',
+    'verticalAlignment': 'MIDDLE'
+}
+
+# Row layout: title, spacer, header, then data
+NUM_COLUMNS = 6
+NUM_HEADER_ROWS = 3
+TITLE_ROW_HEIGHT = 50
+
+# Concurrent worksheet writes (stays within the Sheets API per-user quota)
+MAX_PARALLEL_WRITES = 6
+
+# Display labels keyed by lowercased priority (anything else is capitalized)
+PRIORITY_LABELS = {
+    'high': 'High',
+    'medium': 'Medium',
+    'low': 'Low'
+}
+
+# Data rows per range when uploading very large worksheets
+WRITE_CHUNK_ROWS = 1000
+
+
+def _priority_label(priority: str) -> str:
+    """Display label for a priority (known priorities in any case via PRIORITY_LABELS, others capitalized)"""
+    return PRIORITY_LABELS.get(str(priority).lower()) or str(priority).capitalize()
+
+
 class GoogleSheetService:
     """Service to write test cases to Google Sheets"""
 
@@ -30,6 +85,8 @@ class GoogleSheetService:
         # Initialize Google Sheets client
         self.client = None
         self.spreadsheet = None
+        self._spreadsheet_id = None  # Lets later opens skip the Drive title search
+        self._spreadsheet_lock = threading.Lock()
         self._initialize_client()
 
     def _initialize_client(self):
@@ -50,7 +107,7 @@ class GoogleSheetService:
             # Create client
             self.client = gspread.authorize(creds)
 
-            print(f"✓ Google Sheets client initialized")
+            logger.info("Google Sheets client initialized")
 
         except Exception as e:
             raise Exception(f"Failed to initialize Google Sheets client: {str(e)}")
@@ -59,26 +116,42 @@ class GoogleSheetService:
         """
         Get existing spreadsheet or create new one
 
+        Serialized with a lock so concurrent writers don't create duplicate spreadsheets.
+
         Returns:
             Tuple of (success, error_message)
         """
-        try:
-            # Try to open existing spreadsheet
-            self.spreadsheet = self.client.open(self.sheet_name)
-            print(f"✓ Opened existing spreadsheet: {self.sheet_name}")
-            return True, None
+        with self._spreadsheet_lock:
+            if self._spreadsheet_id:
+                try:
+                    spreadsheet = self.client.open_by_key(self._spreadsheet_id)
+                    # Keep the object other threads may be using; only replace it if it was never set
+                    if self.spreadsheet is None:
+                        self.spreadsheet = spreadsheet
+                    return True, None
+                except Exception:
+                    # Deleted or no longer shared: look it up by name again
+                    self._spreadsheet_id = None
 
-        except gspread.SpreadsheetNotFound:
-            # Create new spreadsheet
             try:
-                self.spreadsheet = self.client.create(self.sheet_name)
-                print(f"✓ Created new spreadsheet: {self.sheet_name}")
+                # Try to open existing spreadsheet
+                self.spreadsheet = self.client.open(self.sheet_name)
+                self._spreadsheet_id = self.spreadsheet.id
+                logger.info("Opened existing spreadsheet: %s", self.sheet_name)
                 return True, None
-            except Exception as e:
-                return False, f"Failed to create spreadsheet: {str(e)}"
 
-        except Exception as e:
-            return False, f"Error accessing spreadsheet: {str(e)}"
+            except gspread.SpreadsheetNotFound:
+                # Create new spreadsheet
+                try:
+                    self.spreadsheet = self.client.create(self.sheet_name)
+                    self._spreadsheet_id = self.spreadsheet.id
+                    logger.info("Created new spreadsheet: %s", self.sheet_name)
+                    return True, None
+                except Exception as e:
+                    return False, f"Failed to create spreadsheet: {str(e)}"
+
+            except Exception as e:
+                return False, f"Error accessing spreadsheet: {str(e)}"
 
     def _create_worksheet(self, worksheet_name: str) -> Tuple[bool, Optional[any], Optional[str]]:
         """
@@ -94,9 +167,8 @@ class GoogleSheetService:
             # Check if worksheet already exists
             try:
                 worksheet = self.spreadsheet.worksheet(worksheet_name)
-                print(f"Worksheet '{worksheet_name}' already exists, will overwrite")
-                # Clear existing data
-                worksheet.clear()
+                # Existing data is overwritten in place; leftover rows are cleared with the formatting
+                logger.info("Worksheet '%s' already exists, will overwrite", worksheet_name)
                 return True, worksheet, None
             except gspread.WorksheetNotFound:
                 pass
@@ -108,7 +180,7 @@ class GoogleSheetService:
                 cols=10
             )
 
-            print(f"✓ Created new worksheet: {worksheet_name}")
+            logger.debug("Created new worksheet: %s", worksheet_name)
             return True, worksheet, None
 
         except Exception as e:
@@ -119,7 +191,7 @@ class GoogleSheetService:
         test_cases: List[Dict],
         brd_filename: str,
         test_id_prefix: str = "TC"
-    ) -> List[List[str]]:
+    ) -> Tuple[List[List[str]], List[List[str]]]:
         """
         Format test cases into rows for Google Sheets with BRD filename as title
 
@@ -129,7 +201,7 @@ class GoogleSheetService:
             test_id_prefix: Prefix for test IDs
 
         Returns:
-            List of rows (each row is a list of cell values)
+            Tuple of (header_rows, data_rows), each a list of rows (lists of cell values)
         """
         # Row 1: BRD filename as title (will be merged across columns)
         title_row = [f"📋 {brd_filename}", "", "", "", "", ""]
@@ -140,68 +212,87 @@ class GoogleSheetService:
         # Row 3: Header row
         headers = ["Test ID", "Description", "Steps", "Expected Result", "Priority", "Result"]
 
-        # Start with title, empty row, and headers
-        rows = [title_row, empty_row, headers]
-
-        # Data rows - test cases
-        for i, tc in enumerate(test_cases, 1):
-            test_id = f"{test_id_prefix}{i:03d}"  # TC001, TC002, etc.
+        header_rows = [title_row, empty_row, headers]
 
-            row = [
-                test_id,
+        # Data rows - test cases (IDs TC001, TC002, etc.; Result column empty initially)
+        data_rows = [
+            [
+                f"{test_id_prefix}{i:03d}",
                 tc.get('description', ''),
                 tc.get('steps', ''),
                 tc.get('expected_result', ''),
-                tc.get('priority', 'Medium').capitalize(),
-                ''  # Result column empty initially
+                _priority_label(tc.get('priority', 'Medium')),
+                ''
             ]
-            rows.append(row)
+            for i, tc in enumerate(test_cases, 1)
+        ]
 
-        return rows
+        return header_rows, data_rows
 
-    def _apply_formatting(self, worksheet, brd_filename: str):
+    def _write_rows(self, worksheet_name: str, header_rows: List[List[str]], data_rows: List[List[str]]):
+        """
+        Upload rows to a worksheet starting at A1
+
+        Cells are all plain strings, so they are sent with RAW input (no
+        type inference). Very large uploads are split into ranges of
+        WRITE_CHUNK_ROWS data rows, sent together in one values.batchUpdate.
+
+        Args:
+            worksheet_name: Name of the worksheet (tab)
+            header_rows: Title, spacer and header rows
+            data_rows: Test case rows
+        """
+        if len(data_rows) <= WRITE_CHUNK_ROWS:
+            self.spreadsheet.values_update(
+                absolute_range_name(worksheet_name, 'A1'),
+                params={'valueInputOption': 'RAW'},
+                body={'values': header_rows + data_rows}
+            )
+            return
+
+        data = [{'range': absolute_range_name(worksheet_name, 'A1'), 'values': header_rows}]
+        for start in range(0, len(data_rows), WRITE_CHUNK_ROWS):
+            data.append({
+                'range': absolute_range_name(worksheet_name, f"A{len(header_rows) + start + 1}"),
+                'values': data_rows[start:start + WRITE_CHUNK_ROWS]
+            })
+        self.spreadsheet.values_batch_update({'valueInputOption': 'RAW', 'data': data})
+
+    def _apply_formatting(self, worksheet, brd_filename: str, num_rows: Optional[int] = None):
         """
         Apply formatting to worksheet (title, headers, colors, etc.)
 
+        Merging, title/header formats, row height and frozen rows are sent
+        as a single spreadsheets.batchUpdate instead of one call each. When
+        num_rows is given, values left below it by a previous (longer) write
+        are cleared in the same batch.
+
         Args:
             worksheet: Worksheet object to format
             brd_filename: BRD filename for title
+            num_rows: Number of rows just written (optional)
         """
         try:
-            # Format Row 1: BRD Title (merged, large, centered, bold)
-            worksheet.merge_cells('A1:F1')
-            worksheet.format('A1:F1', {
-                'backgroundColor': {'red': 0.4, 'green': 0.2, 'blue': 0.8},  # Purple
-                'textFormat': {
-                    'bold': True,
-                    'fontSize': 14,
-                    'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}  # White text
-                },
-                'horizontalAlignment': 'CENTER',
-                'verticalAlignment': 'MIDDLE'
-            })
+            requests = self._formatting_requests(worksheet.id)
 
-            # Set row height for title
-            worksheet.set_row_height(1, 50)
-
-            # Format Row 3: Header row (bold, blue background)
-            worksheet.format('A3:F3', {
-                'backgroundColor': {'red': 0.2, 'green': 0.4, 'blue': 0.8},  # Blue
-                'textFormat': {
-                    'bold': True,
-                    'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}
-                },
-                'horizontalAlignment': 'CENTER',
-                'verticalAlignment': 'MIDDLE'
-            })
+            if num_rows is not None and num_rows < worksheet.row_count:
+                requests.append({
+                    'updateCells': {
+                        'range': {
+                            'sheetId': worksheet.id,
+                            'startRowIndex': num_rows,
+                            'endRowIndex': worksheet.row_count
+                        },
+                        'fields': 'userEnteredValue'
+                    }
+                })
 
-            # Freeze first 3 rows (title + empty + header)
-            worksheet.freeze(rows=3)
+            self.spreadsheet.batch_update({'requests': requests})
 
-            print(f"✓ Applied formatting to worksheet")
+            logger.debug("Applied formatting to worksheet %s", worksheet.title)
 
         except Exception as e:
-            print(f"Warning: Could not apply formatting: {str(e)}")
+            logger.warning("Could not apply formatting: %s", e)
 
     def write_test_cases(
         self,
@@ -223,10 +314,7 @@ class GoogleSheetService:
             Tuple of (success, sheet_url, error_message)
         """
         try:
-            print(f"\n{'='*60}")
-            print(f"Writing {len(test_cases)} test cases to Google Sheets")
-            print(f"BRD: {brd_filename}")
-            print(f"{'='*60}\n")
+            logger.debug("Writing %d test cases to Google Sheets (BRD: %s)", len(test_cases), brd_filename)
 
             # Step 1: Get or create spreadsheet
             success, error = self._get_or_create_spreadsheet()
@@ -239,39 +327,231 @@ class GoogleSheetService:
                 return False, None, error
 
             # Step 3: Format test cases into rows (with BRD filename as title)
-            rows = self._format_test_cases_for_sheet(
+            header_rows, data_rows = self._format_test_cases_for_sheet(
                 test_cases,
                 brd_filename or worksheet_name,
                 test_id_prefix
             )
+            num_rows = len(header_rows) + len(data_rows)
 
             # Step 4: Write data to worksheet
-            print(f"Writing {len(rows)} rows to worksheet...")
-            worksheet.update('A1', rows)
-            print(f"✓ Data written successfully")
+            self._write_rows(worksheet_name, header_rows, data_rows)
+            logger.debug("Wrote %d rows to worksheet %s", num_rows, worksheet_name)
 
-            # Step 5: Apply formatting
-            self._apply_formatting(worksheet, brd_filename or worksheet_name)
+            # Step 5: Apply formatting (and clear rows left over from a longer previous write)
+            self._apply_formatting(worksheet, brd_filename or worksheet_name, num_rows=num_rows)
 
             # Get sheet URL
             sheet_url = self.spreadsheet.url
 
-            print(f"\n{'='*60}")
-            print(f"✓ SUCCESS!")
-            print(f"  - Spreadsheet: {self.sheet_name}")
-            print(f"  - Worksheet: {worksheet_name}")
-            print(f"  - BRD: {brd_filename}")
-            print(f"  - Test cases: {len(test_cases)}")
-            print(f"  - URL: {sheet_url}")
-            print(f"{'='*60}\n")
+            logger.info(
+                "Wrote %d test cases for %s to %s / %s (%s)",
+                len(test_cases), brd_filename, self.sheet_name, worksheet_name, sheet_url
+            )
 
             return True, sheet_url, None
 
         except Exception as e:
             error_msg = f"Failed to write to Google Sheets: {str(e)}"
-            print(f"✗ {error_msg}")
+            logger.error(error_msg)
             return False, None, error_msg
 
+    def _formatting_requests(self, sheet_id: int) -> List[Dict]:
+        """
+        Build Sheets API requests for title/header formatting of a worksheet
+
+        Args:
+            sheet_id: Numeric ID of the worksheet
+
+        Returns:
+            List of batchUpdate request dictionaries
+        """
+        def row_range(row_index: int) -> Dict:
+            return {
+                'sheetId': sheet_id,
+                'startRowIndex': row_index,
+                'endRowIndex': row_index + 1,
+                'startColumnIndex': 0,
+                'endColumnIndex': NUM_COLUMNS
+            }
+
+        def repeat_format(row_index: int, cell_format: Dict) -> Dict:
+            return {
+                'repeatCell': {
+                    'range': row_range(row_index),
+                    'cell': {'userEnteredFormat': cell_format},
+                    'fields': 'userEnteredFormat(' + ','.join(cell_format) + ')'
+                }
+            }
+
+        return [
+            {'mergeCells': {'range': row_range(0), 'mergeType': 'MERGE_ALL'}},
+            repeat_format(0, TITLE_FORMAT),
+            {
+                'updateDimensionProperties': {
+                    'range': {
+                        'sheetId': sheet_id,
+                        'dimension': 'ROWS',
+                        'startIndex': 0,
+                        'endIndex': 1
+                    },
+                    'properties': {'pixelSize': TITLE_ROW_HEIGHT},
+                    'fields': 'pixelSize'
+                }
+            },
+            repeat_format(2, HEADER_FORMAT),
+            {
+                'updateSheetProperties': {
+                    'properties': {
+                        'sheetId': sheet_id,
+                        'gridProperties': {'frozenRowCount': NUM_HEADER_ROWS}
+                    },
+                    'fields': 'gridProperties.frozenRowCount'
+                }
+            }
+        ]
+
+    def batch_write_test_cases(
+        self,
+        jobs: List[Tuple[List[Dict], str, str]],
+        test_id_prefix: str = "TC"
+    ) -> List[Tuple[bool, Optional[str], Optional[str]]]:
+        """
+        Write several BRDs' test cases into new worksheets with two API calls
+
+        One spreadsheets.batchUpdate adds all worksheets (the API assigns
+        their sheet ids), a second fills and formats them. The Sheets API
+        applies a batch atomically; if either call fails (or a worksheet
+        name already exists) the affected jobs fall back to write_test_cases
+        one by one, which isolates failures.
+        Worksheet names must be unique within the batch: a job repeating an
+        earlier job's name fails instead of overwriting that worksheet.
+
+        Args:
+            jobs: List of (test_cases, worksheet_name, brd_filename) tuples
+            test_id_prefix: Prefix for test IDs (default: TC)
+
+        Returns:
+            List of (success, sheet_url, error_message) tuples, one per job
+        """
+        if not jobs:
+            return []
+
+        logger.debug("Writing %d worksheet(s) to Google Sheets in one batch", len(jobs))
+
+        success, error = self._get_or_create_spreadsheet()
+        if not success:
+            return [(False, None, error)] * len(jobs)
+
+        outcomes = [None] * len(jobs)
+        writable, batch_titles = [], set()
+        for index, (_, worksheet_name, _) in enumerate(jobs):
+            if worksheet_name in batch_titles:
+                outcomes[index] = (False, None, f"Duplicate worksheet name in batch: {worksheet_name}")
+                continue
+            batch_titles.add(worksheet_name)
+            writable.append(index)
+
+        # One spreadsheet object for the whole batch (other writers may reopen self.spreadsheet)
+        spreadsheet = self.spreadsheet
+        try:
+            existing_titles = {ws.title for ws in spreadsheet.worksheets()}
+
+            add_requests, batch_rows = [], []
+            batched, fallback = [], []
+            for index in writable:
+                test_cases, worksheet_name, brd_filename = jobs[index]
+                if worksheet_name in existing_titles:
+                    fallback.append(index)
+                    continue
+
+                batched.append(index)
+                header_rows, data_rows = self._format_test_cases_for_sheet(
+                    test_cases,
+                    brd_filename or worksheet_name,
+                    test_id_prefix
+                )
+                rows = header_rows + data_rows
+                batch_rows.append(rows)
+
+                add_requests.append({
+                    'addSheet': {
+                        'properties': {
+                            'title': worksheet_name,
+                            'gridProperties': {
+                                'rowCount': max(150, len(rows)),
+                                'columnCount': 10
+                            }
+                        }
+                    }
+                })
+
+            if add_requests:
+                # Sheet ids are assigned by the API: ids picked here could collide with a concurrent batch
+                replies = spreadsheet.batch_update({'requests': add_requests})['replies']
+
+                requests = []
+                for rows, reply in zip(batch_rows, replies):
+                    sheet_id = reply['addSheet']['properties']['sheetId']
+                    requests.append({
+                        'updateCells': {
+                            'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': 0},
+                            'rows': [
+                                {'values': [{'userEnteredValue': {'stringValue': str(value)}} for value in row]}
+                                for row in rows
+                            ],
+                            'fields': 'userEnteredValue'
+                        }
+                    })
+                    requests.extend(self._formatting_requests(sheet_id))
+
+                spreadsheet.batch_update({'requests': requests})
+                logger.info("Batch wrote %d worksheet(s) to %s", len(batched), self.sheet_name)
+
+        except Exception as e:
+            # Worksheets added before the failure are overwritten by the one-by-one writes
+            logger.warning("Batch write failed (%s), writing worksheets one by one", e)
+            batched, fallback = [], writable
+
+        sheet_url = spreadsheet.url
+        for index in batched:
+            outcomes[index] = (True, sheet_url, None)
+        fallback_outcomes = self.write_many_test_cases([jobs[index] for index in fallback], test_id_prefix)
+        for index, outcome in zip(fallback, fallback_outcomes):
+            outcomes[index] = outcome
+
+        return outcomes
+
+    def write_many_test_cases(
+        self,
+        jobs: List[Tuple[List[Dict], str, str]],
+        test_id_prefix: str = "TC"
+    ) -> List[Tuple[bool, Optional[str], Optional[str]]]:
+        """
+        Write several BRDs' test cases to their own worksheets concurrently
+
+        Each job is an independent write_test_cases call; the calls are
+        I/O-bound, so they run in a small thread pool.
+
+        Args:
+            jobs: List of (test_cases, worksheet_name, brd_filename) tuples
+            test_id_prefix: Prefix for test IDs (default: TC)
+
+        Returns:
+            List of (success, sheet_url, error_message) tuples, in job order
+        """
+        if len(jobs) <= 1:
+            return [
+                self.write_test_cases(test_cases, worksheet_name, brd_filename=brd_filename, test_id_prefix=test_id_prefix)
+                for test_cases, worksheet_name, brd_filename in jobs
+            ]
+
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_WRITES, len(jobs))) as executor:
+            return list(executor.map(
+                lambda job: self.write_test_cases(job[0], job[1], brd_filename=job[2], test_id_prefix=test_id_prefix),
+                jobs
+            ))
+
     def get_spreadsheet_url(self) -> Optional[str]:
         """Get URL of the current spreadsheet"""
         if self.spreadsheet:
@@ -279,6 +559,20 @@ class GoogleSheetService:
         return None
 
 
+@functools.lru_cache(maxsize=4)
+def _get_gsheet_service(credentials_file: str, sheet_name: str) -> GoogleSheetService:
+    return GoogleSheetService(credentials_file, sheet_name)
+
+
+def get_gsheet_service(credentials_file: Optional[str] = None, sheet_name: Optional[str] = None) -> GoogleSheetService:
+    """Shared service per credentials + spreadsheet, so credentials are loaded and authorized once"""
+    # Resolve the defaults first so get_gsheet_service() and get_gsheet_service(None, None) share an instance
+    return _get_gsheet_service(
+        credentials_file or os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials/service-account.json'),
+        sheet_name or os.getenv('GOOGLE_SHEET_NAME', 'BRD_TestCases_Output')
+    )
+
+
 # Convenience function
 def write_testcases_to_sheet(
     test_cases: List[Dict],
@@ -300,5 +594,5 @@ def write_testcases_to_sheet(
     Returns:
         Tuple of (success, sheet_url, error_message)
     """
-    service = GoogleSheetService(credentials_file, sheet_name)
+    service = get_gsheet_service(credentials_file, sheet_name)
     return service.write_test_cases(test_cases, worksheet_name, brd_filename)
\ No newline at end of file
@@ -1,11 +1,164 @@
 """
 PDF Extraction Service
 Extract text content from PDF BRD documents
+
+PyPDF2 and pdfplumber (which pulls in pdfminer.six and Pillow) are imported
+on first use, keeping them out of app startup and extraction worker spawns.
 """
-import PyPDF2
-import pdfplumber
-from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Tuple, Union
+import atexit
+import io
+import logging
+import multiprocessing
 import os
+import re
+import sys
+import threading
+
+from app.config import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# A PDF source is either a filesystem path or a seekable binary file object
+PDFSource = Union[str, os.PathLike, BinaryIO]
+
+# Page-parallel pdfplumber extraction: used for PDFs with at least this many
+# pages; each task extracts a range of this many pages from one open of the
+# PDF, so one huge PDF can't hog the pool
+PARALLEL_MIN_PAGES = 4
+PARALLEL_PAGE_BATCH = 10
+MAX_EXTRACT_PROCESSES = min(os.cpu_count() or 1, 4)
+
+# Fallback when worker processes are unavailable: extract page ranges in threads
+# (each task opens its own handle, since a pdfplumber document isn't thread-safe).
+# Off by default: text extraction is mostly CPU-bound, so threads only pay off
+# where reading the file dominates (e.g. network storage)
+USE_THREADS = os.getenv('PDF_EXTRACT_THREADS', 'False').lower() == 'true'
+MAX_EXTRACT_THREADS = 8
+
+# Leading pages checked with PyPDF2 before a full extraction; if none of them
+# has text the PDF is treated as scanned and pdfplumber is skipped
+PROBE_PAGES = 3
+
+# Text cleanup: 3+ line breaks (with blank lines between), runs of non-newline whitespace
+_MULTI_BLANK = re.compile(r'\n\s*\n\s*\n+')
+_WS_RUN = re.compile(r'[ \t\f\v]+')
+
+
+def _is_path(pdf_source: PDFSource) -> bool:
+    """Check whether a PDF source is a filesystem path"""
+    return isinstance(pdf_source, (str, os.PathLike))
+
+
+def _rewind(pdf_source: PDFSource):
+    """Seek file-object sources back to the start before (re)reading them"""
+    if not _is_path(pdf_source):
+        pdf_source.seek(0)
+
+
+def _shareable_source(pdf_source: PDFSource) -> Union[str, bytes]:
+    """
+    PDF source that extraction workers can open on their own: a path, or the file object's bytes
+
+    The file object's position is restored, since an open pdfplumber document may still read from it.
+    """
+    if _is_path(pdf_source):
+        return os.fspath(pdf_source)
+    position = pdf_source.tell()
+    try:
+        pdf_source.seek(0)
+        return pdf_source.read()
+    finally:
+        pdf_source.seek(position)
+
+
+def _can_use_process_pool() -> bool:
+    """Worker processes can't be started reliably on Windows or from frozen executables"""
+    return sys.platform != 'win32' and not getattr(sys, 'frozen', False) and MAX_EXTRACT_PROCESSES > 1
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Shared extraction pool, started on first use (spawned: the app process runs threads)"""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            # Checked again under the lock: concurrent first requests must not start two pools
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=MAX_EXTRACT_PROCESSES,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(_process_pool.shutdown, cancel_futures=True)
+    return _process_pool
+
+
+def _page_ranges(num_pages: int) -> List[Tuple[int, int]]:
+    """Split 1-based page numbers into (first, last) ranges of PARALLEL_PAGE_BATCH pages"""
+    return [
+        (first, min(first + PARALLEL_PAGE_BATCH - 1, num_pages))
+        for first in range(1, num_pages + 1, PARALLEL_PAGE_BATCH)
+    ]
+
+
+def _extract_page_range(pdf_source: Union[str, bytes], page_range: Tuple[int, int]) -> List[str]:
+    """
+    Pool worker: extract the text of a range of pages from one open of the PDF
+
+    Args:
+        pdf_source: Path to PDF file or the PDF's bytes
+        page_range: (first, last) 1-based page numbers, inclusive
+
+    Returns:
+        List of page texts, in page order
+    """
+    import pdfplumber
+
+    if isinstance(pdf_source, bytes):
+        pdf_source = io.BytesIO(pdf_source)
+    first, last = page_range
+    with pdfplumber.open(pdf_source, pages=range(first, last + 1)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _extract_pages_parallel(pdf_source: Union[str, bytes], num_pages: int) -> List[str]:
+    """
+    Extract every page's text in the process pool (pdfminer parsing is CPU-bound)
+
+    Args:
+        pdf_source: Path to PDF file or the PDF's bytes
+        num_pages: Number of pages in the PDF
+
+    Returns:
+        List of page texts, in page order
+    """
+    executor = _get_process_pool()
+    ranges = _page_ranges(num_pages)
+    results = executor.map(_extract_page_range, [pdf_source] * len(ranges), ranges)
+    return [page_text for range_texts in results for page_text in range_texts]
+
+
+def _extract_pages_threaded(pdf_source: Union[str, bytes], num_pages: int) -> List[str]:
+    """
+    Extract every page's text in a thread pool (overlaps the file reads)
+
+    Args:
+        pdf_source: Path to PDF file or the PDF's bytes
+        num_pages: Number of pages in the PDF
+
+    Returns:
+        List of page texts, in page order
+    """
+    ranges = _page_ranges(num_pages)
+    with ThreadPoolExecutor(max_workers=min(MAX_EXTRACT_THREADS, len(ranges))) as executor:
+        results = executor.map(_extract_page_range, [pdf_source] * len(ranges), ranges)
+        return [page_text for range_texts in results for page_text in range_texts]
 
 
 class PDFExtractor:
@@ -15,94 +168,176 @@ class PDFExtractor:
         """Initialize PDF extractor"""
         pass
 
-    def extract_text_pypdf2(self, pdf_path: str) -> str:
+    def extract_text_pypdf2(self, pdf_source: PDFSource) -> str:
         """
         Extract text using PyPDF2 library
 
         Args:
-            pdf_path: Path to PDF file
+            pdf_source: Path to PDF file or binary file object
 
         Returns:
             Extracted text content
         """
-        text = ""
+        parts = []
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
+            import PyPDF2
+
+            _rewind(pdf_source)
+            pdf_reader = PyPDF2.PdfReader(pdf_source)
 
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n\n"
+            for page in pdf_reader.pages:
+                parts.append(page.extract_text() or "")
 
-            return text.strip()
+            return "\n\n".join(parts).strip()
 
         except Exception as e:
-            print(f"PyPDF2 extraction failed: {str(e)}")
+            logger.warning("PyPDF2 extraction failed: %s", e)
             return ""
 
-    def extract_text_pdfplumber(self, pdf_path: str) -> str:
+    def extract_text_pdfplumber(self, pdf_source: PDFSource) -> str:
         """
         Extract text using pdfplumber library (more accurate)
 
+        Pages of PDFs with PARALLEL_MIN_PAGES or more pages are extracted in a
+        process pool, or in threads (USE_THREADS) where worker processes can't
+        be used; file objects are read into memory and shared with the workers.
+
         Args:
-            pdf_path: Path to PDF file
+            pdf_source: Path to PDF file or binary file object
 
         Returns:
             Extracted text content
         """
-        text = ""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n\n"
-
-            return text.strip()
+            _, text = self._extract_and_info(pdf_source)
+            return text
 
         except Exception as e:
-            print(f"pdfplumber extraction failed: {str(e)}")
+            logger.warning("pdfplumber extraction failed: %s", e)
             return ""
 
-    def extract_text(self, pdf_path: str, method: str = "auto") -> Tuple[bool, str, Optional[str]]:
+    def _extract_and_info(self, pdf_source: PDFSource, all_pages: bool = True) -> Tuple[dict, str]:
+        """
+        Collect page count, first-page text check and page text from one pdfplumber open
+
+        Args:
+            pdf_source: Path to PDF file or binary file object
+            all_pages: Extract every page (False: only the first page, for the text check)
+
+        Returns:
+            Tuple of ({'num_pages', 'has_text'}, extracted_text)
+        """
+        import pdfplumber
+
+        info = {'num_pages': 0, 'has_text': False}
+        page_texts = None
+
+        _rewind(pdf_source)
+        with pdfplumber.open(pdf_source) as pdf:
+            num_pages = info['num_pages'] = len(pdf.pages)
+
+            extract_pages = None
+            if all_pages and num_pages >= PARALLEL_MIN_PAGES:
+                if _can_use_process_pool():
+                    extract_pages = _extract_pages_parallel
+                elif USE_THREADS:
+                    extract_pages = _extract_pages_threaded
+
+            if extract_pages is not None:
+                try:
+                    page_texts = extract_pages(_shareable_source(pdf_source), num_pages)
+                except Exception as e:
+                    logger.warning("Parallel pdfplumber extraction failed (%s), extracting serially", e)
+
+            if page_texts is None:
+                pages = pdf.pages if all_pages else pdf.pages[:1]
+                page_texts = [page.extract_text() for page in pages]
+
+        # Check if first page has text
+        if page_texts:
+            info['has_text'] = bool(page_texts[0] and len(page_texts[0].strip()) > 10)
+
+        return info, "\n\n".join(page_text for page_text in page_texts if page_text).strip()
+
+    def _probe_has_text(self, pdf_source: PDFSource) -> bool:
+        """
+        Cheaply check whether a PDF has a text layer (PyPDF2, first PROBE_PAGES pages)
+
+        Args:
+            pdf_source: Path to PDF file or binary file object
+
+        Returns:
+            False only if the probe read the pages and found no text; True otherwise
+        """
+        try:
+            import PyPDF2
+
+            _rewind(pdf_source)
+            pdf_reader = PyPDF2.PdfReader(pdf_source)
+            for page in pdf_reader.pages[:PROBE_PAGES]:
+                page_text = page.extract_text()
+                if page_text and len(page_text.strip()) >= 10:
+                    return True
+            return False
+        except Exception:
+            # PyPDF2 can't read it; let pdfplumber try
+            return True
+
+    def extract_text(
+        self,
+        pdf_source: PDFSource,
+        method: str = "auto",
+        filename: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[str]]:
         """
         Extract text from PDF using best available method
 
+        File objects (e.g. an upload's stream) are read in place, so uploads
+        never need to be written to disk first.
+
         Args:
-            pdf_path: Path to PDF file
+            pdf_source: Path to PDF file or seekable binary file object
             method: Extraction method ('auto', 'pypdf2', 'pdfplumber')
+            filename: Name used for the PDF check and logs when pdf_source is a file object
 
         Returns:
             Tuple of (success, extracted_text, error_message)
         """
-        # Validate file exists
-        if not os.path.exists(pdf_path):
-            return False, "", f"File not found: {pdf_path}"
-
-        # Validate file is PDF
-        if not pdf_path.lower().endswith('.pdf'):
+        if _is_path(pdf_source):
+            # Validate file exists (one stat call)
+            try:
+                os.stat(pdf_source)
+            except OSError:
+                return False, "", f"File not found: {pdf_source}"
+            filename = os.path.basename(pdf_source)
+
+        # Validate file is PDF (only the extension is lowercased)
+        if filename is not None and filename[-4:].lower() != '.pdf':
             return False, "", "File is not a PDF"
 
         extracted_text = ""
 
         # Try extraction based on method
         if method == "auto":
+            # Scanned PDFs would fail anyway: don't pay for a full pdfplumber parse
+            logger.info("Extracting text from: %s", filename or 'stream')
+            if not self._probe_has_text(pdf_source):
+                return False, "", "Failed to extract sufficient text from PDF. File may be scanned image or corrupted."
+
             # Try pdfplumber first (more accurate)
-            print(f"Extracting text from: {os.path.basename(pdf_path)}")
-            print("   Method: pdfplumber (primary)")
-            extracted_text = self.extract_text_pdfplumber(pdf_path)
+            logger.debug("Method: pdfplumber (primary)")
+            extracted_text = self.extract_text_pdfplumber(pdf_source)
 
             # Fallback to PyPDF2 if pdfplumber fails
             if not extracted_text or len(extracted_text.strip()) < 100:
-                print("   Method: PyPDF2 (fallback)")
-                extracted_text = self.extract_text_pypdf2(pdf_path)
+                logger.debug("Method: PyPDF2 (fallback)")
+                extracted_text = self.extract_text_pypdf2(pdf_source)
 
         elif method == "pypdf2":
-            extracted_text = self.extract_text_pypdf2(pdf_path)
+            extracted_text = self.extract_text_pypdf2(pdf_source)
 
         elif method == "pdfplumber":
-            extracted_text = self.extract_text_pdfplumber(pdf_path)
+            extracted_text = self.extract_text_pdfplumber(pdf_source)
 
         else:
             return False, "", f"Unknown extraction method: {method}"
@@ -114,8 +349,10 @@ class PDFExtractor:
         # Clean up extracted text
         extracted_text = self._clean_text(extracted_text)
 
-        print(f"✓ Successfully extracted {len(extracted_text)} characters")
-        print(f"✓ Extracted {extracted_text.count(chr(10)) + 1} lines")
+        logger.info(
+            "✓ Successfully extracted %d characters (%d lines)",
+            len(extracted_text), extracted_text.count('\n') + 1
+        )
 
         return True, extracted_text, None
 
@@ -129,36 +366,21 @@ class PDFExtractor:
         Returns:
             Cleaned text
         """
-        # Remove excessive blank lines (more than 2 consecutive)
-        lines = text.split('\n')
-        cleaned_lines = []
-        blank_count = 0
-
-        for line in lines:
-            if line.strip() == '':
-                blank_count += 1
-                if blank_count <= 2:
-                    cleaned_lines.append(line)
-            else:
-                blank_count = 0
-                cleaned_lines.append(line)
-
-        text = '\n'.join(cleaned_lines)
-
         # Remove excessive spaces
-        text = ' '.join(text.split())
+        text = _WS_RUN.sub(' ', text)
 
-        # Restore line breaks
-        text = text.replace('. ', '.\n')
+        # Remove excessive blank lines
+        text = _MULTI_BLANK.sub('\n\n', text)
 
         return text.strip()
 
-    def get_pdf_info(self, pdf_path: str) -> dict:
+    def get_pdf_info(self, pdf_path: str, file_size: Optional[int] = None) -> dict:
         """
         Get PDF metadata and info
 
         Args:
             pdf_path: Path to PDF file
+            file_size: File size in bytes, if the caller already has it (skips a stat call)
 
         Returns:
             Dictionary with PDF info
@@ -172,24 +394,29 @@ class PDFExtractor:
 
         try:
             # Get file size
-            file_size = os.path.getsize(pdf_path)
+            if file_size is None:
+                file_size = os.stat(pdf_path).st_size
             info['file_size_mb'] = round(file_size / (1024 * 1024), 2)
 
             # Get page count and check for text
-            with pdfplumber.open(pdf_path) as pdf:
-                info['num_pages'] = len(pdf.pages)
-
-                # Check if first page has text
-                if pdf.pages:
-                    first_page_text = pdf.pages[0].extract_text()
-                    info['has_text'] = bool(first_page_text and len(first_page_text.strip()) > 10)
+            page_info, _ = self._extract_and_info(pdf_path, all_pages=False)
+            info.update(page_info)
 
         except Exception as e:
-            print(f"Error getting PDF info: {str(e)}")
+            logger.warning("Error getting PDF info: %s", e)
 
         return info
 
 
+# Shared instance (PDFExtractor holds no state)
+_EXTRACTOR = PDFExtractor()
+
+
+def get_pdf_extractor() -> PDFExtractor:
+    """Shared extractor used by the routes and the convenience function"""
+    return _EXTRACTOR
+
+
 # Convenience function for quick usage
 def extract_pdf_text(pdf_path: str) -> Tuple[bool, str, Optional[str]]:
     """
@@ -201,5 +428,4 @@ def extract_pdf_text(pdf_path: str) -> Tuple[bool, str, Optional[str]]:
     Returns:
         Tuple of (success, extracted_text, error_message)
     """
-    extractor = PDFExtractor()
-    return extractor.extract_text(pdf_path)
\ No newline at end of file
+    return _EXTRACTOR.extract_text(pdf_path)
\ No newline at end of file
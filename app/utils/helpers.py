@@ -4,8 +4,38 @@ Utility functions for file handling, ID generation, timestamps, etc.
 """
 import os
 import re
+import json
+import logging
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from app.utils.validators import REQUIRED_TC_FIELD_SET
+
+try:
+    import orjson  # Optional: faster JSON parsing of responses
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+logger = logging.getLogger(__name__)
+
+# Filename sanitizing: anything but letters, digits, '_' and '-'; runs of underscores
+_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9_-]')
+_COLLAPSE_RE = re.compile(r'_+')
+
+# Precomputed default-prefix test IDs (TC000 ... TC999)
+_TC_IDS = tuple(f"TC{i:03d}" for i in range(1000))
+
+# Sort order of test case priorities (unknown priorities sort last)
+_PRIORITY_MAP = {
+    'high': 1,
+    'medium': 2,
+    'low': 3
+}
+
+# Last formatted timestamp per format string: format -> (epoch second, formatted)
+_TS_CACHE: dict = {}
 
 
 def generate_test_id(index: int, prefix: str = "TC") -> str:
@@ -19,6 +49,8 @@ def generate_test_id(index: int, prefix: str = "TC") -> str:
     Returns:
         Formatted test ID (e.g., TC001, TC002, TC003)
     """
+    if prefix == "TC" and 0 <= index < 1000:
+        return _TC_IDS[index]
     return f"{prefix}{index:03d}"
 
 
@@ -32,7 +64,19 @@ def get_timestamp(format: str = "%Y%m%d_%H%M%S") -> str:
     Returns:
         Formatted timestamp string
     """
-    return datetime.now().strftime(format)
+    now = datetime.now()
+    if '%f' in format:
+        # Sub-second formats can't be reused within the same second
+        return now.strftime(format)
+
+    second = int(now.timestamp())
+    cached = _TS_CACHE.get(format)
+    if cached is not None and cached[0] == second:
+        return cached[1]
+
+    formatted = now.strftime(format)
+    _TS_CACHE[format] = (second, formatted)
+    return formatted
 
 
 def sanitize_filename(filename: str) -> str:
@@ -49,10 +93,10 @@ def sanitize_filename(filename: str) -> str:
     name_without_ext = os.path.splitext(filename)[0]
 
     # Replace spaces and special characters with underscore
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', name_without_ext)
+    sanitized = _SANITIZE_RE.sub('_', name_without_ext)
 
     # Remove multiple consecutive underscores
-    sanitized = re.sub(r'_+', '_', sanitized)
+    sanitized = _COLLAPSE_RE.sub('_', sanitized)
 
     # Remove leading/trailing underscores
     sanitized = sanitized.strip('_')
@@ -87,6 +131,43 @@ def generate_worksheet_name(brd_filename: str, max_length: int = 100) -> str:
     return worksheet_name
 
 
+def unique_worksheet_names(worksheet_names: List[str], max_length: int = 100) -> List[str]:
+    """
+    Make worksheet names unique within one batch
+
+    Names repeat when the same BRD filename is uploaded twice within one
+    second; later repeats get a "_2", "_3", ... suffix.
+
+    Args:
+        worksheet_names: Worksheet names, in batch order
+        max_length: Maximum length for worksheet name (Google Sheets limit is 100)
+
+    Returns:
+        Worksheet names with repeats suffixed, in the same order
+    """
+    used = set(worksheet_names)
+    counts = {}
+    unique = []
+    for name in worksheet_names:
+        counts[name] = counts.get(name, 0) + 1
+        if counts[name] == 1:
+            unique.append(name)
+            continue
+
+        n = counts[name]
+        while True:
+            suffix = f"_{n}"
+            candidate = name[:max_length - len(suffix)] + suffix
+            if candidate not in used:
+                break
+            n += 1
+        counts[name] = n
+        used.add(candidate)
+        unique.append(candidate)
+
+    return unique
+
+
 def cleanup_upload_file(filepath: str) -> bool:
     """
     Delete uploaded file after processing
@@ -100,11 +181,11 @@ def cleanup_upload_file(filepath: str) -> bool:
     try:
         if os.path.exists(filepath):
             os.remove(filepath)
-            print(f"✓ Cleaned up file: {filepath}")
+            logger.debug("Cleaned up file: %s", filepath)
             return True
         return False
     except Exception as e:
-        print(f"  Error cleaning up file {filepath}: {str(e)}")
+        logger.warning("Error cleaning up file %s: %s", filepath, e)
         return False
 
 
@@ -136,11 +217,9 @@ def parse_test_cases_from_response(response_text: str) -> list:
     Returns:
         List of test case dictionaries
     """
-    import json
-
     try:
-        # Try to parse as JSON first
-        data = json.loads(response_text)
+        # Try to parse as JSON first (orjson.JSONDecodeError subclasses json.JSONDecodeError)
+        data = _json_loads(response_text)
 
         # If it's a dict with 'test_cases' key
         if isinstance(data, dict) and 'test_cases' in data:
@@ -168,13 +247,10 @@ def validate_test_case_structure(test_case: dict) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    required_fields = ['description', 'steps', 'expected_result', 'priority']
-
-    for field in required_fields:
-        if field not in test_case or not test_case[field]:
-            return False
+    if not REQUIRED_TC_FIELD_SET.issubset(test_case):
+        return False
 
-    return True
+    return all(test_case[field] for field in REQUIRED_TC_FIELD_SET)
 
 
 def get_priority_order(priority: str) -> int:
@@ -187,12 +263,7 @@ def get_priority_order(priority: str) -> int:
     Returns:
         Numeric value for sorting
     """
-    priority_map = {
-        'high': 1,
-        'medium': 2,
-        'low': 3
-    }
-    return priority_map.get(priority.lower(), 999)
+    return _PRIORITY_MAP.get(priority.lower() if priority else '', 999)
 
 
 def estimate_processing_time(file_size_mb: float) -> int:
@@ -2,9 +2,22 @@
 Validation functions for file uploads and data
 """
 import os
-from werkzeug.utils import secure_filename
+import re
+import stat
 from typing import Tuple, Optional
 
+# Runs of non-alphanumeric characters (Unicode-aware, so Vietnamese letters count)
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+# Size of each slice (start, middle, end) sampled from long BRDs for the alphanumeric check
+BRD_SAMPLE_SIZE = 4096
+
+# Fields every test case must have (in error-reporting order, and as a set), and accepted priorities
+REQUIRED_TC_FIELDS = ('description', 'steps', 'expected_result', 'priority')
+REQUIRED_TC_FIELD_SET = frozenset(REQUIRED_TC_FIELDS)
+VALID_PRIORITIES = ('high', 'medium', 'low')
+_VALID_PRIORITIES = frozenset(VALID_PRIORITIES)
+
 
 def allowed_file(filename: str, allowed_extensions: set) -> bool:
     """
@@ -12,16 +25,43 @@ def allowed_file(filename: str, allowed_extensions: set) -> bool:
 
     Args:
         filename: Name of the file
-        allowed_extensions: Set of allowed extensions (e.g., {'pdf', 'docx'})
+        allowed_extensions: Set of allowed lowercase extensions (e.g., {'pdf', 'docx'})
 
     Returns:
         True if file extension is allowed, False otherwise
     """
-    return '.' in filename and \
-        filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    _, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in allowed_extensions
+
+
+def _get_upload_size(file) -> int:
+    """
+    Get size of an uploaded file without spooling it to disk
 
+    Measured with seek/tell only: Werkzeug keeps small uploads in an
+    in-memory SpooledTemporaryFile, whose fileno() would roll it over to a
+    temp file.
 
-def validate_file_upload(file, allowed_extensions: set, max_size_mb: int = 16) -> Tuple[bool, Optional[str]]:
+    Args:
+        file: Uploaded file object from Flask request
+
+    Returns:
+        File size in bytes
+
+    Raises:
+        AttributeError, OSError: If the stream can't seek
+    """
+    stream = getattr(file, 'stream', file)
+    file_size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)  # Reset to beginning
+    return file_size
+
+
+def validate_file_upload(
+    file,
+    allowed_extensions: set,
+    max_size_mb: int = 16
+) -> Tuple[bool, Optional[str], Optional[int]]:
     """
     Validate uploaded file
 
@@ -31,34 +71,38 @@ def validate_file_upload(file, allowed_extensions: set, max_size_mb: int = 16) -
         max_size_mb: Maximum file size in megabytes
 
     Returns:
-        Tuple of (is_valid, error_message)
+        Tuple of (is_valid, error_message, file_size); file_size is None if it
+        couldn't be determined
     """
     # Check if file exists
     if not file:
-        return False, "No file provided"
+        return False, "No file provided", None
 
     # Check if file has a filename
     if file.filename == '':
-        return False, "No file selected"
+        return False, "No file selected", None
 
     # Check file extension
     if not allowed_file(file.filename, allowed_extensions):
-        return False, f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
+        return False, f"File type not allowed. Allowed types: {', '.join(sorted(allowed_extensions))}", None
 
-    # Check file size (if file has seek capability)
-    try:
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
+    max_size_bytes = max_size_mb * 1024 * 1024
+
+    # Reject on the part's declared Content-Length without touching the stream
+    if (getattr(file, 'content_length', None) or 0) > max_size_bytes:
+        return False, f"File too large. Maximum size: {max_size_mb}MB", None
 
-        max_size_bytes = max_size_mb * 1024 * 1024
-        if file_size > max_size_bytes:
-            return False, f"File too large. Maximum size: {max_size_mb}MB"
+    # Check file size (if it can be determined)
+    try:
+        file_size = _get_upload_size(file)
     except (AttributeError, OSError):
-        # If file doesn't support seek, skip size check
-        pass
+        # If file doesn't support seek, skip size check (the declared length is all there is)
+        return True, None, getattr(file, 'content_length', None) or None
 
-    return True, None
+    if file_size > max_size_bytes:
+        return False, f"File too large. Maximum size: {max_size_mb}MB", file_size
+
+    return True, None, file_size
 
 
 def get_secure_filename(filename: str) -> str:
@@ -71,6 +115,8 @@ def get_secure_filename(filename: str) -> str:
     Returns:
         Secure filename safe for filesystem
     """
+    from werkzeug.utils import secure_filename
+
     return secure_filename(filename)
 
 
@@ -84,22 +130,20 @@ def validate_test_case_data(test_case: dict) -> Tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    required_fields = ['description', 'steps', 'expected_result', 'priority']
+    # Check if all required fields exist (report the first missing one in field order)
+    missing = REQUIRED_TC_FIELD_SET - test_case.keys()
+    if missing:
+        field = next(f for f in REQUIRED_TC_FIELDS if f in missing)
+        return False, f"Missing required field: {field}"
 
-    # Check if all required fields exist
-    for field in required_fields:
-        if field not in test_case:
-            return False, f"Missing required field: {field}"
-
-        # Check if field is not empty
-        if not test_case[field] or str(test_case[field]).strip() == '':
-            return False, f"Field '{field}' cannot be empty"
+    # Check that no field is empty
+    empty = next((f for f in REQUIRED_TC_FIELDS if not test_case[f] or not str(test_case[f]).strip()), None)
+    if empty is not None:
+        return False, f"Field '{empty}' cannot be empty"
 
     # Validate priority value
-    valid_priorities = ['high', 'medium', 'low']
-    priority = str(test_case['priority']).lower()
-    if priority not in valid_priorities:
-        return False, f"Invalid priority. Must be one of: {', '.join(valid_priorities)}"
+    if str(test_case['priority']).lower() not in _VALID_PRIORITIES:
+        return False, f"Invalid priority. Must be one of: {', '.join(VALID_PRIORITIES)}"
 
     return True, None
 
@@ -121,8 +165,14 @@ def validate_brd_content(content: str, min_length: int = 100) -> Tuple[bool, Opt
     if len(content.strip()) < min_length:
         return False, f"BRD content too short. Minimum {min_length} characters required"
 
-    # Check if content contains meaningful text (not just special characters)
-    alphanumeric_count = sum(c.isalnum() for c in content)
+    # Check if content contains meaningful text (not just special characters).
+    # Long BRDs are checked on samples from the start, middle and end only.
+    if len(content) > 3 * BRD_SAMPLE_SIZE:
+        middle = len(content) // 2
+        sample = content[:BRD_SAMPLE_SIZE] + content[middle:middle + BRD_SAMPLE_SIZE] + content[-BRD_SAMPLE_SIZE:]
+    else:
+        sample = content
+    alphanumeric_count = len(_NON_ALNUM_RE.sub('', sample))
     if alphanumeric_count < min_length * 0.5:
         return False, "BRD content appears to be invalid or corrupted"
 
@@ -192,10 +242,13 @@ def validate_file_path(file_path: str) -> Tuple[bool, Optional[str]]:
     if not file_path:
         return False, "File path is empty"
 
-    if not os.path.exists(file_path):
+    # One stat() instead of exists() + isfile(); like exists(), any OSError counts as missing
+    try:
+        st = os.stat(file_path)
+    except (OSError, ValueError):
         return False, f"File not found: {file_path}"
 
-    if not os.path.isfile(file_path):
+    if not stat.S_ISREG(st.st_mode):
         return False, f"Path is not a file: {file_path}"
 
     return True, None
\ No newline at end of file
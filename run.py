@@ -1,24 +1,38 @@
 """
 Entry point for BRD Test Case Automation System
-Run Flask development server
+Run Flask development server (debug) or waitress (production)
+
+The app is only created under the main guard: PDF extraction workers are
+spawned processes that re-import this module, and must not build an app.
+For other WSGI servers use wsgi:app.
 """
 from app import create_app
-from app.config import Config
+from app.config import CONFIG
 
-# Create Flask app
-app = create_app()
+HOST = '0.0.0.0'  # Listen on all network interfaces
+PORT = 5001
+
+
+def main():
+    """Create the app and serve it"""
+    app = create_app()
 
-if __name__ == '__main__':
-    # Run development server
     print("\n" + "=" * 70)
-    print("Starting Flask Development Server...")
+    print("Starting Flask Development Server..." if CONFIG.DEBUG else "Starting waitress server...")
     print("=" * 70)
-    print(f"Server will be available at: http://localhost:5001")
-    print(f"API endpoint: http://localhost:5001/api/generate-testcases")
+    print(f"Server will be available at: http://localhost:{PORT}")
+    print(f"API endpoint: http://localhost:{PORT}/api/generate-testcases")
     print("=" * 70 + "\n")
 
-    app.run(
-        host='0.0.0.0',  # Listen on all network interfaces
-        port=5001,  # Port number
-        debug=Config.DEBUG  # Enable debug mode from config
-    )
\ No newline at end of file
+    if CONFIG.DEBUG:
+        # Development server with reloader and debugger
+        app.run(host=HOST, port=PORT, debug=True)
+    else:
+        # Multi-threaded production server: uploads are processed concurrently
+        from waitress import serve
+
+        serve(app, host=HOST, port=PORT, threads=8, connection_limit=100)
+
+
+if __name__ == '__main__':
+    main()
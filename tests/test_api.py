@@ -0,0 +1,234 @@
+"""
+Tests for the BRD API routes, using the Flask test client with the
+PDF, ChatGPT and Google Sheets services replaced by fakes
+"""
+import dataclasses
+import io
+
+import pytest
+
+from app import create_app
+from app.config import CONFIG
+from app.routes import brd_routes
+
+BRD_TEXT = "The registration form has name, email and password fields and a Submit button. " * 5
+
+
+def _case(i: int) -> dict:
+    return {
+        'description': f"Verify case {i}",
+        'steps': "1. Open page",
+        'expected_result': "Page opens",
+        'priority': 'High'
+    }
+
+
+class FakeExtractor:
+    """Records what each extraction read from its source"""
+
+    def __init__(self):
+        self.reads = []
+
+    def extract_text(self, pdf_source, filename=None):
+        if isinstance(pdf_source, str):
+            with open(pdf_source, 'rb') as f:
+                self.reads.append(f.read())
+        else:
+            self.reads.append(pdf_source.read())
+        return True, BRD_TEXT, None
+
+
+class FakeChatGPT:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_test_cases(self, brd_content, target_count=90, batch_mode=True, use_cache=True):
+        self.calls += 1
+        return True, [_case(i) for i in range(3)], None
+
+
+class FakeSheets:
+    url = 'https://docs.google.com/spreadsheets/d/test'
+
+    def __init__(self):
+        self.jobs = []
+
+    def batch_write_test_cases(self, jobs, test_id_prefix='TC'):
+        self.jobs.extend(jobs)
+        return [(True, self.url, None)] * len(jobs)
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Replace the routes' PDF, ChatGPT and Google Sheets services (and clear the route cache)"""
+    fakes = {'pdf': FakeExtractor(), 'chatgpt': FakeChatGPT(), 'sheets': FakeSheets()}
+    monkeypatch.setattr(brd_routes, 'get_pdf_extractor', lambda: fakes['pdf'])
+    monkeypatch.setattr(brd_routes, 'get_chatgpt_service', lambda: fakes['chatgpt'])
+    monkeypatch.setattr(brd_routes, 'get_gsheet_service', lambda: fakes['sheets'])
+    monkeypatch.setattr(brd_routes, '_testcase_cache', type(brd_routes._testcase_cache)())
+    return fakes
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app whose config overrides CONFIG (uploads go to a temp folder)"""
+    def make(**overrides):
+        config = dataclasses.replace(CONFIG, UPLOAD_FOLDER=str(tmp_path / 'uploads'), **overrides)
+        app = create_app(config)
+        app.testing = True
+        return app
+    return make
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app().test_client()
+
+
+# ========== App configuration ==========
+
+def test_too_large_message_uses_app_limit(make_app):
+    client = make_app(MAX_CONTENT_LENGTH=1024 * 1024).test_client()
+
+    response = client.post(
+        '/api/generate-testcases/stream',
+        data=b'x' * (2 * 1024 * 1024),
+        headers={'X-Filename': 'big.pdf', 'Content-Type': 'application/pdf'}
+    )
+
+    assert response.status_code == 413
+    assert response.get_json() == {'success': False, 'error': 'File too large. Maximum size: 1.0MB'}
+
+
+def test_config_endpoint_reports_app_config(make_app):
+    client = make_app(TEST_CASE_PREFIX='REQ', MAX_CONTENT_LENGTH=2 * 1024 * 1024, OPENAI_MODEL='main-model').test_client()
+
+    config = client.get('/api/config').get_json()['config']
+
+    assert config['test_case_prefix'] == 'REQ'
+    assert config['max_file_size_mb'] == 2.0
+    assert config['model'] == 'main-model'
+    assert set(config['models']) == {'happy', 'validation', 'edge', 'combined'}
+
+
+def test_stream_upload_rejects_disallowed_extension(make_app):
+    client = make_app(ALLOWED_EXTENSIONS=frozenset({'docx'})).test_client()
+
+    response = client.post('/api/generate-testcases/stream', data=b'%PDF', headers={'X-Filename': 'brd.pdf'})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'File type not allowed. Allowed types: docx'
+
+
+# ========== Uploads ==========
+
+def test_multipart_upload_is_read_from_the_start(client, services):
+    data = b'%PDF-1.4 ' + b'x' * 5000
+
+    response = client.post(
+        '/api/generate-testcases',
+        data={'files': (io.BytesIO(data), 'brd.pdf'), 'target_count': '3'},
+        content_type='multipart/form-data'
+    )
+
+    assert response.status_code == 200
+    assert services['pdf'].reads == [data]
+    assert response.get_json()['results'][0]['total_test_cases'] == 3
+
+
+def test_same_named_uploads_get_distinct_worksheets(client, services):
+    response = client.post(
+        '/api/generate-testcases',
+        data={'files': [(io.BytesIO(b'%PDF one'), 'brd.pdf'), (io.BytesIO(b'%PDF two'), 'brd.pdf')]},
+        content_type='multipart/form-data'
+    )
+
+    assert response.status_code == 200
+    names = [worksheet_name for _, worksheet_name, _ in services['sheets'].jobs]
+    assert len(names) == 2 and len(set(names)) == 2
+    assert [r['worksheet_name'] for r in response.get_json()['results']] == names
+
+
+def test_stream_upload_is_written_to_a_temp_file_and_removed(make_app, services, tmp_path):
+    client = make_app().test_client()
+    data = b'%PDF-1.4 ' + b'y' * 200000
+
+    response = client.post(
+        '/api/generate-testcases/stream?target_count=3',
+        data=data,
+        headers={'X-Filename': 'big brd.pdf', 'Content-Type': 'application/pdf'}
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['successful_files'] == 1
+    assert body['results'][0]['filename'] == 'big_brd.pdf'
+    assert services['pdf'].reads == [data]
+    assert list((tmp_path / 'uploads').iterdir()) == []
+
+
+def test_stream_upload_requires_filename(client, services):
+    response = client.post('/api/generate-testcases/stream', data=b'%PDF')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Missing X-Filename header'
+
+
+# ========== Generated test case cache ==========
+
+def _upload_brd(client, query=''):
+    return client.post(
+        '/api/generate-testcases' + query,
+        data={'files': (io.BytesIO(b'%PDF same content'), 'brd.pdf'), 'target_count': '3'},
+        content_type='multipart/form-data'
+    )
+
+
+def test_identical_brd_reuses_generated_test_cases(client, services):
+    assert _upload_brd(client).status_code == 200
+    assert _upload_brd(client).status_code == 200
+
+    assert services['chatgpt'].calls == 1
+    assert len(services['sheets'].jobs) == 2
+
+
+def test_no_cache_forces_regeneration(client, services):
+    _upload_brd(client)
+    _upload_brd(client, '?no_cache=1')
+
+    assert services['chatgpt'].calls == 2
+
+
+def test_test_case_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(brd_routes, '_testcase_cache', type(brd_routes._testcase_cache)())
+    monkeypatch.setattr(brd_routes, 'TESTCASE_CACHE_SIZE', 2)
+
+    brd_routes._store_test_cases('a', [_case(1)])
+    brd_routes._store_test_cases('b', [_case(2)])
+    brd_routes._get_cached_test_cases('a')  # 'b' is now the least recently used
+    brd_routes._store_test_cases('c', [_case(3)])
+
+    assert brd_routes._get_cached_test_cases('b') is None
+    assert brd_routes._get_cached_test_cases('a') == [_case(1)]
+    assert brd_routes._get_cached_test_cases('c') == [_case(3)]
+
+
+# ========== /api/config ETag ==========
+
+def test_config_is_served_with_etag_and_304(client):
+    first = client.get('/api/config')
+    etag = first.headers['ETag']
+
+    cached = client.get('/api/config', headers={'If-None-Match': etag})
+    stale = client.get('/api/config', headers={'If-None-Match': '"other"'})
+
+    assert first.status_code == 200 and first.get_json()['success'] is True
+    assert cached.status_code == 304 and cached.data == b''
+    assert stale.status_code == 200 and stale.headers['ETag'] == etag
+
+
+def test_config_etag_differs_between_apps(make_app):
+    first = make_app(TEST_CASE_PREFIX='A').test_client().get('/api/config')
+    second = make_app(TEST_CASE_PREFIX='B').test_client().get('/api/config')
+
+    assert first.headers['ETag'] != second.headers['ETag']
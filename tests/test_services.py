@@ -0,0 +1,737 @@
+"""
+Tests for service-level logic that doesn't need network access
+(OpenAI, Google Sheets and the process pool are replaced by fakes)
+"""
+import io
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.services import chatgpt_service, pdf_extractor
+
+from app.services.chatgpt_service import (
+    ChatGPTService,
+    _CombinedStreamParser,
+    _TestCaseStreamParser,
+    _chunk_brd,
+    _count_tokens,
+    _split_count
+)
+from app.services.gsheet_service import GoogleSheetService, NUM_HEADER_ROWS, _priority_label
+
+
+MODEL = 'gpt-4o'
+
+
+def _case(i: int, **overrides) -> dict:
+    tc = {
+        'description': f"Verify {{button}} {i} shows \"Submit\"",
+        'steps': f"1. Open page\n2. Click button {i}",
+        'expected_result': 'Form is submitted [OK]',
+        'priority': 'High'
+    }
+    tc.update(overrides)
+    return tc
+
+
+def _feed_in_chunks(text: str, size: int) -> _TestCaseStreamParser:
+    parser = _TestCaseStreamParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+    return parser
+
+
+# ========== _TestCaseStreamParser ==========
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 10000])
+def test_parser_decodes_cases_split_across_chunks(size):
+    cases = [_case(i) for i in range(5)]
+    text = json.dumps({'cases': cases}, indent=2)
+
+    parser = _feed_in_chunks(text, size)
+
+    assert parser.complete
+    assert parser.error is None
+    assert parser.test_cases == cases
+
+
+def test_parser_accepts_empty_array():
+    parser = _feed_in_chunks('{"cases": []}', 4)
+
+    assert parser.complete
+    assert parser.test_cases == []
+
+
+def test_parser_truncated_input_is_incomplete_not_failed():
+    cases = [_case(i) for i in range(3)]
+    text = json.dumps({'cases': cases})
+    truncated = text[:text.rindex('{') + 20]  # Cut off inside the last test case
+
+    parser = _feed_in_chunks(truncated, 5)
+
+    assert not parser.complete
+    assert parser.error is None
+    assert not parser.done
+    assert parser.test_cases == cases[:2]
+
+
+def test_parser_without_array_is_incomplete():
+    parser = _feed_in_chunks('{"cases": ', 3)
+
+    assert not parser.complete
+    assert parser.error is None
+    assert parser.test_cases == []
+
+
+def test_parser_rejects_case_missing_required_fields():
+    bad = _case(2)
+    del bad['steps']
+    del bad['priority']
+    text = json.dumps({'cases': [_case(1), bad, _case(3)]})
+
+    parser = _feed_in_chunks(text, 8)
+
+    assert parser.done
+    assert not parser.complete
+    assert parser.error == "Test case 2 missing required field: priority, steps"
+    assert parser.test_cases == [_case(1)]
+
+
+@pytest.mark.parametrize('item', ['"just text"', '42', '["nested"]', 'null'])
+def test_parser_rejects_non_object_items(item):
+    text = '{"cases": [' + json.dumps(_case(1)) + ', ' + item + ']}'
+
+    parser = _feed_in_chunks(text, 6)
+
+    assert parser.error is not None
+    assert parser.error.startswith("Failed to parse JSON: unexpected")
+    assert parser.test_cases == [_case(1)]
+
+
+def test_parser_ignores_input_after_it_is_done():
+    parser = _feed_in_chunks(json.dumps({'cases': [_case(1)]}), 4)
+    parser.feed('[{"garbage"')
+
+    assert parser.complete
+    assert parser.error is None
+    assert parser.test_cases == [_case(1)]
+
+
+# ========== _CombinedStreamParser ==========
+
+def _combined(happy, validation, edge) -> str:
+    return json.dumps({'happy': happy, 'validation': validation, 'edge': edge}, indent=2)
+
+
+@pytest.mark.parametrize('size', [1, 5, 64, 100000])
+def test_combined_parser_decodes_every_group(size):
+    text = _combined([_case(1)], [_case(2), _case(3)], [])
+
+    parser = _CombinedStreamParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+
+    assert parser.complete
+    assert parser.group('happy') == (True, [_case(1)])
+    assert parser.group('validation') == (True, [_case(2), _case(3)])
+    assert parser.group('edge') == (True, [])
+
+
+def test_combined_parser_keeps_complete_cases_of_truncated_response():
+    text = _combined([_case(1)], [_case(2), _case(3)], [_case(4)])
+    truncated = text[:text.index('Click button 3')]  # Cut off inside the second validation case
+
+    parser = _CombinedStreamParser()
+    parser.feed(truncated)
+
+    assert not parser.done
+    assert parser.group('happy') == (True, [_case(1)])
+    assert parser.group('validation') == (False, [_case(2)])
+    assert parser.group('edge') == (False, [])
+
+
+# ========== Response cache ==========
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chatgpt_service, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(chatgpt_service, '_last_cache_prune', None)
+    return tmp_path
+
+
+def _age(path, seconds: float):
+    mtime = os.path.getmtime(path) - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_cache_dir_is_anchored_to_project_root():
+    assert os.path.isabs(chatgpt_service.CACHE_DIR)
+
+
+def test_cache_key_ignores_whitespace_changes():
+    key = chatgpt_service._response_cache_key
+    assert key(MODEL, "Analyze\n\nthe  BRD") == key(MODEL, "Analyze the BRD")
+    assert key(MODEL, "Analyze the BRD") != key('other-model', "Analyze the BRD")
+
+
+def test_cached_response_round_trips(cache_dir):
+    chatgpt_service._write_cached_response('abc', '{"cases": []}')
+
+    assert chatgpt_service._read_cached_response('abc') == '{"cases": []}'
+    assert chatgpt_service._read_cached_response('missing') is None
+
+
+def test_expired_response_is_a_miss_and_deleted(cache_dir):
+    chatgpt_service._write_cached_response('abc', '{"cases": []}')
+    _age(cache_dir / 'abc.json', chatgpt_service.CACHE_TTL_SECONDS + 1)
+
+    assert chatgpt_service._read_cached_response('abc') is None
+    assert not (cache_dir / 'abc.json').exists()
+
+
+def test_write_prunes_expired_entries(cache_dir):
+    for name in ('old.json', 'fresh.json', 'orphan.tmp'):
+        (cache_dir / name).write_text('{"response": ""}')
+    _age(cache_dir / 'old.json', chatgpt_service.CACHE_TTL_SECONDS + 1)
+    _age(cache_dir / 'orphan.tmp', chatgpt_service.CACHE_TTL_SECONDS + 1)
+
+    chatgpt_service._write_cached_response('new', '{}')
+
+    assert sorted(p.name for p in cache_dir.iterdir()) == ['fresh.json', 'new.json']
+
+
+# ========== ChatGPTService single-call generation ==========
+
+class _FakeStream:
+    """Async iterator over streamed completion chunks"""
+
+    def __init__(self, text: str, finish_reason: str, size: int = 50):
+        self._chunks = [
+            SimpleNamespace(usage=None, choices=[SimpleNamespace(
+                delta=SimpleNamespace(content=text[start:start + size]),
+                finish_reason=finish_reason if start + size >= len(text) else None
+            )])
+            for start in range(0, len(text), size)
+        ]
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for chunk in self._chunks:
+            yield chunk
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def gpt_service(monkeypatch, cache_dir):
+    """Service whose completions come from gpt_service.responses[model] (requests are recorded)"""
+    service = ChatGPTService(
+        api_key='test',
+        model='main-model',
+        models={'happy': 'cheap', 'validation': 'cheap', 'edge': 'strong', 'combined': 'combined'}
+    )
+    service.requests = []
+    service.responses = {}
+
+    async def create_completion(**kwargs):
+        service.requests.append((kwargs['model'], kwargs['messages'][1]['content'], kwargs['max_tokens']))
+        text, finish_reason = service.responses[kwargs['model']].pop(0)
+        return _FakeStream(text, finish_reason)
+
+    monkeypatch.setattr(service, '_create_completion', create_completion)
+    return service
+
+
+def test_combined_model_defaults_to_main_model(monkeypatch):
+    monkeypatch.delenv('OPENAI_MODEL_COMBINED', raising=False)
+    monkeypatch.delenv('OPENAI_MODEL_STRONG', raising=False)
+
+    service = ChatGPTService(api_key='test', model='main-model')
+
+    assert service.models['combined'] == 'main-model'
+    assert service.models['edge'] == 'main-model'
+
+
+def test_single_call_returns_complete_combined_response(gpt_service):
+    happy, validation, edge = [_case(i) for i in range(2)], [_case(i) for i in range(2, 4)], [_case(9)]
+    gpt_service.responses = {'combined': [(_combined(happy, validation, edge), 'stop')]}
+
+    success, test_cases, error = gpt_service.generate_test_cases('BRD', 70, single_call=True, use_cache=False)
+
+    assert (success, error) == (True, None)
+    assert test_cases == happy + validation + edge
+    assert [model for model, _, _ in gpt_service.requests] == ['combined']
+
+
+def test_single_call_rerequests_only_missing_cases(gpt_service):
+    happy = [_case(i) for i in range(30)]
+    validation = [_case(i) for i in range(30, 60)]
+    text = _combined(happy, validation, [_case(60)])
+    truncated = text[:text.index('Click button 45')]  # Cut off inside validation case 16
+    more_validation = [_case(i) for i in range(100, 115)]
+    edge = [_case(i) for i in range(200, 210)]
+    gpt_service.responses = {
+        'combined': [(truncated, 'length')],
+        'cheap': [(json.dumps({'cases': more_validation}), 'stop')],
+        'strong': [(json.dumps({'cases': edge}), 'stop')]
+    }
+
+    success, test_cases, error = gpt_service.generate_test_cases('BRD', 70, single_call=True, use_cache=False)
+
+    assert (success, error) == (True, None)
+    assert test_cases == happy + validation[:15] + more_validation + edge
+    requested = {model: prompt for model, prompt, _ in gpt_service.requests}
+    assert sorted(requested) == ['cheap', 'combined', 'strong']
+    assert 'generate EXACTLY 15 test cases' in requested['cheap']
+    assert 'generate EXACTLY 10 test cases' in requested['strong']
+
+
+def test_batches_are_requested_separately_by_default(gpt_service):
+    gpt_service.responses = {
+        'cheap': [(json.dumps({'cases': [_case(1)]}), 'stop'), (json.dumps({'cases': [_case(2)]}), 'stop')],
+        'strong': [(json.dumps({'cases': [_case(3)]}), 'stop')]
+    }
+
+    success, test_cases, error = gpt_service.generate_test_cases('BRD', 90, use_cache=False)
+
+    assert (success, error) == (True, None)
+    assert len(test_cases) == 3
+    assert sorted(model for model, _, _ in gpt_service.requests) == ['cheap', 'cheap', 'strong']
+
+
+# ========== Rate limiting and retries ==========
+
+def _rate_limit_error(retry_after: str) -> openai.RateLimitError:
+    response = httpx.Response(
+        429,
+        headers={'retry-after': retry_after},
+        request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    )
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_rate_limiter_spaces_requests_beyond_the_burst():
+    limiter = chatgpt_service._RateLimiter(rate=2, period=0.2)
+
+    async def acquire_all():
+        times = []
+        for _ in range(4):
+            await limiter.acquire()
+            times.append(time.monotonic())
+        return times
+
+    times = chatgpt_service._run_sync(acquire_all())
+
+    assert times[1] - times[0] < 0.05  # The first `rate` requests go out at once
+    assert times[3] - times[0] >= 0.15  # Then one every period / rate seconds
+
+
+def test_retry_wait_honors_retry_after_header():
+    def retry_state(error):
+        return SimpleNamespace(outcome=SimpleNamespace(exception=lambda: error), attempt_number=1)
+
+    assert chatgpt_service._wait_retry_after(retry_state(_rate_limit_error('7'))) == 7.0
+    assert chatgpt_service._wait_retry_after(retry_state(_rate_limit_error('600'))) == 60.0
+    assert 0 <= chatgpt_service._wait_retry_after(retry_state(_rate_limit_error('soon'))) <= 60
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    service = ChatGPTService(api_key='test', model='main-model')
+    attempts = []
+
+    async def create(**kwargs):
+        attempts.append(kwargs['model'])
+        if len(attempts) < 3:
+            raise _rate_limit_error('0')
+        return 'stream'
+
+    monkeypatch.setattr(service, 'client', SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+
+    assert chatgpt_service._run_sync(service._create_completion(model='main-model')) == 'stream'
+    assert len(attempts) == 3
+
+
+# ========== Structured outputs ==========
+
+@pytest.mark.parametrize('model, expected', [
+    ('gpt-4o', 'json_schema'),
+    ('gpt-4o-2024-08-06', 'json_schema'),
+    ('gpt-4o-mini', 'json_schema'),
+    ('gpt-4o-2024-05-13', 'json_object'),
+    ('gpt-4-turbo-preview', 'json_object'),
+])
+def test_response_format_matches_exact_model_names(model, expected):
+    assert chatgpt_service._response_format(model)['type'] == expected
+
+
+def test_rejected_json_schema_falls_back_to_json_mode(gpt_service, monkeypatch):
+    monkeypatch.setattr(chatgpt_service, '_JSON_SCHEMA_REJECTED', set())
+    gpt_service.model = 'gpt-4o'
+    formats = []
+
+    async def create_completion(**kwargs):
+        formats.append(kwargs['response_format']['type'])
+        if kwargs['response_format']['type'] == 'json_schema':
+            response = httpx.Response(400, request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+            raise openai.BadRequestError("response_format json_schema is not supported", response=response, body=None)
+        return _FakeStream(json.dumps({'cases': [_case(1)]}), 'stop')
+
+    monkeypatch.setattr(gpt_service, '_create_completion', create_completion)
+
+    success, test_cases, error = gpt_service.generate_test_cases('BRD', 10, batch_mode=False, use_cache=False)
+    gpt_service.generate_test_cases('BRD 2', 10, batch_mode=False, use_cache=False)
+
+    assert (success, test_cases, error) == (True, [_case(1)], None)
+    assert formats == ['json_schema', 'json_object', 'json_object']  # The rejection is remembered
+
+
+# ========== _chunk_brd / _split_count ==========
+
+def _section(number: int, paragraphs: int) -> str:
+    body = '\n\n'.join(
+        f"Requirement {number}.{p}: the user fills in the form and presses the submit button." * 3
+        for p in range(paragraphs)
+    )
+    return f"{number}. Section {number}\n{body}\n\n"
+
+
+def test_chunk_brd_keeps_short_brd_whole():
+    brd = _section(1, 2) + _section(2, 2)
+
+    assert _chunk_brd(brd, MODEL, max_tokens=10000) == [brd.strip()]
+
+
+def test_chunk_brd_respects_token_budget_and_keeps_content():
+    brd = ''.join(_section(n, 4) for n in range(1, 13))
+    max_tokens = 400
+
+    chunks = _chunk_brd(brd, MODEL, max_tokens=max_tokens)
+
+    assert len(chunks) > 1
+    assert all(_count_tokens(chunk, MODEL) <= max_tokens for chunk in chunks)
+    assert ''.join(' '.join(chunks).split()) == ''.join(brd.split())
+
+
+def test_chunk_brd_starts_chunks_on_section_boundaries():
+    brd = ''.join(_section(n, 2) for n in range(1, 9))
+    section_tokens = _count_tokens(_section(1, 2), MODEL)
+
+    chunks = _chunk_brd(brd, MODEL, max_tokens=section_tokens * 2 + 10)
+
+    assert len(chunks) > 1
+    assert all(chunk.startswith(f"{chunk.split('.', 1)[0]}. Section") for chunk in chunks)
+
+
+def test_chunk_brd_hard_splits_oversized_paragraph():
+    brd = 'x' * 20000  # One paragraph, no section or paragraph breaks
+    max_tokens = 500
+
+    chunks = _chunk_brd(brd, MODEL, max_tokens=max_tokens)
+
+    assert len(chunks) > 1
+    assert all(_count_tokens(chunk, MODEL) <= max_tokens for chunk in chunks)
+    assert ''.join(chunks) == brd
+
+
+@pytest.mark.parametrize('total, weights, expected', [
+    (90, [1, 1, 1], [30, 30, 30]),
+    (10, [1, 1, 1], [4, 3, 3]),
+    (100, [3, 1], [75, 25]),
+    (7, [5, 0, 5], [4, 0, 3]),
+    (0, [2, 3], [0, 0]),
+])
+def test_split_count_is_proportional_and_exact(total, weights, expected):
+    assert _split_count(total, weights) == expected
+
+
+def test_split_count_handles_zero_weights():
+    counts = _split_count(5, [0, 0])
+
+    assert sum(counts) == 5
+
+
+def test_long_brd_is_generated_per_chunk_and_deduplicated(gpt_service, monkeypatch):
+    monkeypatch.setattr(chatgpt_service, 'BRD_CHUNK_TOKENS', 200)
+    monkeypatch.setattr(chatgpt_service, '_chunk_brd', lambda text, model: _chunk_brd(text, model, max_tokens=200))
+    brd = ''.join(_section(n, 2) for n in range(1, 7))
+    gpt_service.responses = {
+        # Both chunks return case 1; the copy from the second chunk is dropped
+        'cheap': [(json.dumps({'cases': [_case(1), _case(2)]}), 'stop')] * 10
+    }
+
+    success, test_cases, error = gpt_service.generate_test_cases(brd, 10, batch_mode=False, use_cache=False)
+
+    assert (success, error) == (True, None)
+    assert len(gpt_service.requests) > 1
+    assert test_cases == [_case(1), _case(2)]
+
+
+# ========== GoogleSheetService ==========
+
+@pytest.mark.parametrize('priority, label', [
+    ('high', 'High'), ('HIGH', 'High'), ('hIgH', 'High'), ('Medium', 'Medium'), ('low', 'Low'), ('critical', 'Critical'),
+])
+def test_priority_label_ignores_case(priority, label):
+    assert _priority_label(priority) == label
+
+
+# ========== GoogleSheetService.batch_write_test_cases ==========
+
+class _FakeWorksheet:
+    def __init__(self, sheet_id: int, title: str):
+        self.id = sheet_id
+        self.title = title
+
+
+class _FakeSpreadsheet:
+    url = 'https://docs.google.com/spreadsheets/d/test'
+
+    def __init__(self, worksheets=(), fail=False, fail_after=None):
+        self._worksheets = list(worksheets)
+        self.fail = fail
+        self.fail_after = fail_after  # Number of calls that succeed before every call fails
+        self.batch_bodies = []
+
+    def worksheets(self):
+        return self._worksheets
+
+    def batch_update(self, body):
+        """Record the body; added sheets get the next free id, like the Sheets API"""
+        self.batch_bodies.append(body)
+        if self.fail or (self.fail_after is not None and len(self.batch_bodies) > self.fail_after):
+            raise RuntimeError('quota exceeded')
+
+        replies = []
+        for request in body['requests']:
+            if 'addSheet' not in request:
+                replies.append({})
+                continue
+            properties = request['addSheet']['properties']
+            sheet = _FakeWorksheet(max(ws.id for ws in self._worksheets) + 1, properties['title'])
+            self._worksheets.append(sheet)
+            replies.append({'addSheet': {'properties': {'sheetId': sheet.id, 'title': sheet.title}}})
+        return {'replies': replies}
+
+
+@pytest.fixture
+def sheet_service():
+    """Service with a fake spreadsheet; one-by-one fallback writes are recorded, not sent"""
+    service = GoogleSheetService.__new__(GoogleSheetService)
+    service.sheet_name = 'Test'
+    service.spreadsheet = _FakeSpreadsheet([_FakeWorksheet(4, 'Existing')])
+    service._get_or_create_spreadsheet = lambda: (True, None)
+    service.fallback_jobs = []
+
+    def write_many(jobs, test_id_prefix='TC'):
+        service.fallback_jobs.extend(jobs)
+        return [(True, service.spreadsheet.url, None)] * len(jobs)
+
+    service.write_many_test_cases = write_many
+    return service
+
+
+def test_batch_write_adds_then_fills_worksheets_in_two_requests(sheet_service):
+    jobs = [([_case(1), _case(2)], 'A_20250101_000000', 'a.pdf'), ([_case(3)], 'B_20250101_000000', 'b.pdf')]
+
+    outcomes = sheet_service.batch_write_test_cases(jobs, test_id_prefix='REQ')
+
+    assert outcomes == [(True, sheet_service.spreadsheet.url, None)] * 2
+    assert sheet_service.fallback_jobs == []
+    assert len(sheet_service.spreadsheet.batch_bodies) == 2
+
+    # Sheet ids are left to the API and read back from its replies
+    add_sheets = [r['addSheet']['properties'] for r in sheet_service.spreadsheet.batch_bodies[0]['requests']]
+    assert [p['title'] for p in add_sheets] == ['A_20250101_000000', 'B_20250101_000000']
+    assert all('sheetId' not in p for p in add_sheets)
+    assert all(p['gridProperties']['rowCount'] >= 150 for p in add_sheets)
+
+    # Each worksheet: its values, then its formatting
+    requests = sheet_service.spreadsheet.batch_bodies[1]['requests']
+    first_update = next(r['updateCells'] for r in requests if 'updateCells' in r)
+    assert first_update['start'] == {'sheetId': 5, 'rowIndex': 0, 'columnIndex': 0}
+    assert first_update['fields'] == 'userEnteredValue'
+    rows = [[cell['userEnteredValue']['stringValue'] for cell in row['values']] for row in first_update['rows']]
+    assert len(rows) == NUM_HEADER_ROWS + 2
+    assert rows[0][0] == '📋 a.pdf'
+    assert rows[2] == ["Test ID", "Description", "Steps", "Expected Result", "Priority", "Result"]
+    assert rows[3][0] == 'REQ001' and rows[4][0] == 'REQ002'
+
+    sheet_ids = {
+        r[kind]['range']['sheetId']
+        for r in requests for kind in ('mergeCells', 'repeatCell') if kind in r
+    }
+    assert sheet_ids == {5, 6}
+
+
+def test_batch_write_falls_back_for_existing_worksheet(sheet_service):
+    jobs = [([_case(1)], 'Existing', 'a.pdf'), ([_case(2)], 'New', 'b.pdf')]
+
+    outcomes = sheet_service.batch_write_test_cases(jobs)
+
+    assert all(success for success, _, _ in outcomes)
+    assert [job[1] for job in sheet_service.fallback_jobs] == ['Existing']
+    requests = sheet_service.spreadsheet.batch_bodies[0]['requests']
+    assert [r['addSheet']['properties']['title'] for r in requests if 'addSheet' in r] == ['New']
+
+
+def test_batch_write_rejects_duplicate_names_in_batch(sheet_service):
+    jobs = [([_case(1)], 'Same', 'a.pdf'), ([_case(2)], 'Same', 'a.pdf')]
+
+    outcomes = sheet_service.batch_write_test_cases(jobs)
+
+    assert outcomes[0][0] is True
+    assert outcomes[1] == (False, None, "Duplicate worksheet name in batch: Same")
+    assert sheet_service.fallback_jobs == []
+    requests = sheet_service.spreadsheet.batch_bodies[0]['requests']
+    assert sum('addSheet' in r for r in requests) == 1
+
+
+def test_batch_write_failure_falls_back_to_one_by_one(sheet_service):
+    sheet_service.spreadsheet.fail = True
+    jobs = [([_case(1)], 'A', 'a.pdf'), ([_case(2)], 'B', 'b.pdf')]
+
+    outcomes = sheet_service.batch_write_test_cases(jobs)
+
+    assert len(outcomes) == 2
+    assert [job[1] for job in sheet_service.fallback_jobs] == ['A', 'B']
+
+
+def test_batch_write_fill_failure_falls_back_to_one_by_one(sheet_service):
+    sheet_service.spreadsheet.fail_after = 1  # Worksheets are added, filling them fails
+    jobs = [([_case(1)], 'A', 'a.pdf'), ([_case(2)], 'B', 'b.pdf')]
+
+    outcomes = sheet_service.batch_write_test_cases(jobs)
+
+    assert all(success for success, _, _ in outcomes)
+    assert [job[1] for job in sheet_service.fallback_jobs] == ['A', 'B']
+
+
+def test_batch_write_without_jobs_makes_no_calls(sheet_service):
+    assert sheet_service.batch_write_test_cases([]) == []
+    assert sheet_service.spreadsheet.batch_bodies == []
+
+
+# ========== PDF extraction ==========
+
+def test_process_pool_is_started_once_under_concurrency(monkeypatch):
+    created = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)  # Widen the window between the check and the assignment
+            created.append(self)
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(pdf_extractor, 'ProcessPoolExecutor', SlowPool)
+    monkeypatch.setattr(pdf_extractor, '_process_pool', None)
+
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(pdf_extractor._get_process_pool())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+@pytest.fixture(scope='module')
+def sample_pdf(tmp_path_factory):
+    """12-page text PDF on disk"""
+    from reportlab.pdfgen import canvas
+
+    path = tmp_path_factory.mktemp('pdf') / 'brd.pdf'
+    pdf = canvas.Canvas(str(path))
+    for page in range(1, 13):
+        pdf.drawString(72, 720, f"Page {page}: the user fills in the registration form and presses Submit.")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+def test_page_ranges_cover_every_page_once():
+    assert pdf_extractor._page_ranges(25) == [(1, 10), (11, 20), (21, 25)]
+    assert pdf_extractor._page_ranges(3) == [(1, 3)]
+
+
+@pytest.mark.parametrize('as_stream', [False, True])
+def test_threaded_extraction_matches_serial(monkeypatch, sample_pdf, as_stream):
+    monkeypatch.setattr(pdf_extractor, '_can_use_process_pool', lambda: False)
+    monkeypatch.setattr(pdf_extractor, 'PARALLEL_PAGE_BATCH', 5)
+    extractor = pdf_extractor.PDFExtractor()
+
+    monkeypatch.setattr(pdf_extractor, 'USE_THREADS', False)
+    serial = extractor.extract_text_pdfplumber(sample_pdf)
+
+    ranges = []
+    extract_range = pdf_extractor._extract_page_range
+
+    def spy(pdf_source, page_range):
+        ranges.append(page_range)
+        return extract_range(pdf_source, page_range)
+
+    monkeypatch.setattr(pdf_extractor, 'USE_THREADS', True)
+    monkeypatch.setattr(pdf_extractor, '_extract_page_range', spy)
+    source = io.BytesIO(open(sample_pdf, 'rb').read()) if as_stream else sample_pdf
+    threaded = extractor.extract_text_pdfplumber(source)
+
+    assert threaded == serial
+    assert 'Page 12:' in threaded
+    assert sorted(ranges) == [(1, 5), (6, 10), (11, 12)]
+
+
+def test_extract_text_reads_upload_streams_in_place(sample_pdf):
+    extractor = pdf_extractor.PDFExtractor()
+    with open(sample_pdf, 'rb') as f:
+        stream = io.BytesIO(f.read())
+
+    success, text, error = extractor.extract_text(stream, filename='brd.pdf')
+
+    assert (success, error) == (True, None)
+    assert text == extractor.extract_text(sample_pdf)[1]
+    assert extractor.extract_text(stream, filename='brd.docx') == (False, "", "File is not a PDF")
+
+
+def test_scanned_pdf_is_rejected_without_pdfplumber(tmp_path, monkeypatch):
+    from reportlab.pdfgen import canvas
+
+    path = tmp_path / 'scanned.pdf'
+    pdf = canvas.Canvas(str(path))
+    for _ in range(5):
+        pdf.rect(72, 72, 300, 500, fill=1)  # Image-like content, no text layer
+        pdf.showPage()
+    pdf.save()
+
+    extractor = pdf_extractor.PDFExtractor()
+    monkeypatch.setattr(extractor, 'extract_text_pdfplumber', lambda source: pytest.fail("pdfplumber was used"))
+
+    success, text, error = extractor.extract_text(str(path))
+
+    assert (success, text) == (False, "")
+    assert error.startswith("Failed to extract sufficient text from PDF")
+
+
+def test_clean_text_squeezes_whitespace_and_blank_lines():
+    raw = "Title\t\t  Page\f1\n\n\n \n\nThe user logs in.  Then\vthe dashboard opens.\n\n"
+
+    cleaned = pdf_extractor.PDFExtractor()._clean_text(raw)
+
+    assert cleaned == "Title Page 1\n\nThe user logs in. Then the dashboard opens."
+
+
+def test_pdf_info_counts_pages_and_checks_first_page_text(sample_pdf):
+    info = pdf_extractor.PDFExtractor().get_pdf_info(sample_pdf, file_size=3 * 1024 * 1024)
+
+    assert info == {'file_name': 'brd.pdf', 'file_size_mb': 3.0, 'num_pages': 12, 'has_text': True}
@@ -0,0 +1,146 @@
+"""
+Tests for the upload validators and helpers
+"""
+import io
+import tempfile
+from datetime import datetime
+
+import pytest
+from werkzeug.datastructures import FileStorage, Headers
+
+from app.utils import helpers
+from app.utils.helpers import get_timestamp, unique_worksheet_names
+from app.utils.validators import BRD_SAMPLE_SIZE, validate_brd_content, validate_file_path, validate_file_upload
+
+
+def _upload(data: bytes, filename: str = 'brd.pdf', content_length: int = 0) -> FileStorage:
+    """Upload kept in memory, like Werkzeug's spooled multipart parts"""
+    stream = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    stream.write(data)
+    stream.seek(0)
+    headers = Headers({'Content-Length': str(content_length)}) if content_length else None
+    return FileStorage(stream=stream, filename=filename, headers=headers)
+
+
+# ========== validate_file_upload ==========
+
+def test_upload_size_is_measured_without_spooling_to_disk():
+    upload = _upload(b'%PDF' + b'x' * 1000)
+
+    assert validate_file_upload(upload, {'pdf'}, max_size_mb=1) == (True, None, 1004)
+    assert not upload.stream._rolled
+    assert upload.stream.tell() == 0
+
+
+def test_oversized_upload_is_rejected():
+    upload = _upload(b'x' * (1024 * 1024 + 1))
+
+    is_valid, error, file_size = validate_file_upload(upload, {'pdf'}, max_size_mb=1)
+
+    assert (is_valid, error, file_size) == (False, "File too large. Maximum size: 1MB", 1024 * 1024 + 1)
+
+
+def test_declared_content_length_is_rejected_before_reading():
+    upload = _upload(b'small', content_length=5 * 1024 * 1024)
+
+    assert validate_file_upload(upload, {'pdf'}, max_size_mb=1) == (False, "File too large. Maximum size: 1MB", None)
+
+
+@pytest.mark.parametrize('filename, error', [
+    ('', "No file provided"),
+    ('brd.exe', "File type not allowed. Allowed types: docx, pdf"),
+])
+def test_upload_name_checks(filename, error):
+    upload = FileStorage(stream=io.BytesIO(b'data'), filename=filename)
+
+    assert validate_file_upload(upload, {'pdf', 'docx'}) == (False, error, None)
+
+
+# ========== unique_worksheet_names ==========
+
+def test_unique_worksheet_names_suffixes_repeats():
+    names = ['brd_20250101_000000', 'other_20250101_000000', 'brd_20250101_000000', 'brd_20250101_000000']
+
+    assert unique_worksheet_names(names) == [
+        'brd_20250101_000000', 'other_20250101_000000', 'brd_20250101_000000_2', 'brd_20250101_000000_3'
+    ]
+
+
+def test_unique_worksheet_names_skips_taken_suffixes_and_respects_max_length():
+    assert unique_worksheet_names(['a', 'a_2', 'a']) == ['a', 'a_2', 'a_3']
+    assert unique_worksheet_names(['x' * 10, 'x' * 10], max_length=10) == ['x' * 10, 'x' * 8 + '_2']
+
+
+# ========== validate_brd_content ==========
+
+def test_brd_content_counts_unicode_alphanumerics():
+    vietnamese = "Người dùng nhập thông tin đăng ký và nhấn nút Gửi. " * 4
+
+    assert validate_brd_content(vietnamese) == (True, None)
+
+
+def test_brd_content_of_symbols_is_rejected():
+    assert validate_brd_content("#$%^&*()_+-=[]{};:,./<>?| " * 10) == (
+        False, "BRD content appears to be invalid or corrupted"
+    )
+
+
+@pytest.mark.parametrize('content, error', [
+    ("   ", "BRD content is empty"),
+    ("Short BRD", "BRD content too short. Minimum 100 characters required"),
+])
+def test_brd_content_length_checks(content, error):
+    assert validate_brd_content(content) == (False, error)
+
+
+def test_long_brd_is_checked_on_start_middle_and_end_samples():
+    text = "The user submits the registration form. " * 200
+    symbols = "#$%^&*()" * (BRD_SAMPLE_SIZE // 8)
+
+    # Text in any sample is enough; only symbols in every sample is rejected
+    assert validate_brd_content(symbols * 4 + text) == (True, None)
+    assert validate_brd_content(text + symbols * 6) == (True, None)
+    assert validate_brd_content(symbols * 6)[0] is False
+
+
+# ========== validate_file_path ==========
+
+def test_validate_file_path(tmp_path):
+    brd = tmp_path / 'brd.pdf'
+    brd.write_bytes(b'%PDF')
+
+    assert validate_file_path(str(brd)) == (True, None)
+    assert validate_file_path(str(tmp_path)) == (False, f"Path is not a file: {tmp_path}")
+    assert validate_file_path(str(tmp_path / 'missing.pdf')) == (False, f"File not found: {tmp_path / 'missing.pdf'}")
+    assert validate_file_path('') == (False, "File path is empty")
+
+
+# ========== get_timestamp ==========
+
+class _FakeDatetime:
+    """datetime whose now() returns the queued values"""
+    values = []
+
+    @classmethod
+    def now(cls):
+        return cls.values.pop(0)
+
+
+def test_timestamp_is_reused_within_the_same_second(monkeypatch):
+    monkeypatch.setattr(helpers, '_TS_CACHE', {})
+    monkeypatch.setattr(helpers, 'datetime', _FakeDatetime)
+    _FakeDatetime.values = [
+        datetime(2025, 1, 1, 12, 0, 0, 100000),
+        datetime(2025, 1, 1, 12, 0, 0, 900000),
+        datetime(2025, 1, 1, 12, 0, 1, 0),
+    ]
+
+    assert [get_timestamp() for _ in range(3)] == ['20250101_120000', '20250101_120000', '20250101_120001']
+
+
+def test_sub_second_timestamps_are_not_reused(monkeypatch):
+    monkeypatch.setattr(helpers, '_TS_CACHE', {})
+    monkeypatch.setattr(helpers, 'datetime', _FakeDatetime)
+    _FakeDatetime.values = [datetime(2025, 1, 1, 12, 0, 0, 100000), datetime(2025, 1, 1, 12, 0, 0, 900000)]
+
+    assert [get_timestamp('%S.%f') for _ in range(2)] == ['00.100000', '00.900000']
@@ -0,0 +1,6 @@
+"""
+WSGI entry point (e.g. waitress-serve --port=5001 wsgi:app)
+"""
+from app import create_app
+
+app = create_app()